@@ -1,8 +1,10 @@
 from django.contrib import admin
+from django.utils import timezone
 from django.utils.html import format_html
+from . import invalidation
 from .models import (
     Department, Service, Doctor, DoctorSchedule, Appointment,
-    News, ContactInquiry, HospitalInfo, Gallery, Announcement
+    News, ContactInquiry, HospitalInfo, Gallery, Announcement, OutboxEvent
 )
 
 @admin.register(Department)
@@ -121,6 +123,11 @@ class GalleryAdmin(admin.ModelAdmin):
     search_fields = ['title', 'description']
     list_editable = ['display_order', 'is_featured']
 
+    def changelist_view(self, request, extra_context=None):
+        # Saving list_editable rows bumps the gallery's cache generation once
+        with invalidation.deferred():
+            return super().changelist_view(request, extra_context)
+
 @admin.register(Announcement)
 class AnnouncementAdmin(admin.ModelAdmin):
     list_display = ['title', 'is_active', 'is_urgent', 'start_date', 'end_date']
@@ -128,6 +135,17 @@ class AnnouncementAdmin(admin.ModelAdmin):
     search_fields = ['title', 'content']
     date_hierarchy = 'start_date'
 
+@admin.register(OutboxEvent)
+class OutboxEventAdmin(admin.ModelAdmin):
+    list_display = ['event_type', 'status', 'attempts', 'created_at', 'available_at', 'processed_at']
+    list_filter = ['status', 'event_type']
+    readonly_fields = ['idempotency_key', 'email_sent_at', 'sms_sent_at', 'created_at']
+    actions = ['retry_now']
+    
+    @admin.action(description='Retry selected events now')
+    def retry_now(self, request, queryset):
+        queryset.exclude(status='done').update(status='pending', available_at=timezone.now())
+
 # Customize admin site
 admin.site.site_header = "Hospital Management System"
 admin.site.site_title = "Hospital Admin"
@@ -0,0 +1,91 @@
+"""
+Cached set of currently active announcements.
+
+The active set only changes when an announcement is written or when the
+clock crosses one of their start_date/end_date boundaries. The ids of the
+set are cached under the Announcement generation (writes invalidate it,
+see invalidation.py) with a timeout that runs out exactly at the next
+boundary, so between boundaries finding the set costs no query.
+
+active_announcements() returns a QuerySet over the cached ids rather than
+the rows themselves, so views can still filter, search and order it.
+"""
+import math
+import time
+
+from django.conf import settings
+from django.db.models import Min, Q
+from django.utils import timezone
+
+from . import invalidation
+from .cache import cache_key, get_cache
+from .models import Announcement
+
+# Upper bound on how long the set is cached when no boundary is coming up
+ANNOUNCEMENT_CACHE_MAX_TIMEOUT = getattr(settings, 'ANNOUNCEMENT_CACHE_MAX_TIMEOUT', 24 * 60 * 60)
+
+invalidation.register('active_announcements', Announcement)
+
+
+def _active_key():
+    return cache_key('active_announcements', *invalidation.generations((Announcement,)))
+
+
+# Urgent first, then newest
+ORDERING = ['-is_urgent', '-start_date']
+
+
+def compute_active_window(now=None):
+    """
+    Return (ids of the announcements active at now, datetime of the next
+    boundary or None). The next boundary is the earliest end of an active
+    announcement or start of an upcoming one.
+    """
+    now = now or timezone.now()
+    active = list(
+        Announcement.objects.filter(is_active=True, start_date__lte=now).filter(
+            Q(end_date__isnull=True) | Q(end_date__gte=now)
+        ).order_by(*ORDERING).values_list('id', 'end_date')
+    )
+    boundaries = [end_date for _, end_date in active if end_date is not None]
+    next_start = Announcement.objects.filter(
+        is_active=True, start_date__gt=now
+    ).aggregate(next_start=Min('start_date'))['next_start']
+    if next_start is not None:
+        boundaries.append(next_start)
+    return [pk for pk, _ in active], min(boundaries, default=None)
+
+
+def _get_entry():
+    cache = get_cache()
+    key = _active_key()
+    entry = cache.get(key)
+    if entry is None:
+        now = timezone.now()
+        ids, boundary = compute_active_window(now)
+        if boundary is None:
+            timeout = ANNOUNCEMENT_CACHE_MAX_TIMEOUT
+        else:
+            # end_date is inclusive, so the set changes just after it
+            timeout = min(
+                max(math.ceil((boundary - now).total_seconds()), 1),
+                ANNOUNCEMENT_CACHE_MAX_TIMEOUT,
+            )
+        entry = {'ids': ids, 'expires_at': time.time() + timeout}
+        cache.set(key, entry, timeout)
+    return entry
+
+
+def active_announcement_ids():
+    """Ids of the announcements active right now, urgent first"""
+    return _get_entry()['ids']
+
+
+def active_announcements():
+    """QuerySet of the announcements active right now, urgent first"""
+    return Announcement.objects.filter(pk__in=active_announcement_ids()).order_by(*ORDERING)
+
+
+def seconds_until_change():
+    """Seconds until the cached active set reaches its next boundary"""
+    return max(math.ceil(_get_entry()['expires_at'] - time.time()), 1)
@@ -0,0 +1,153 @@
+"""
+Batched appointment import (see the import_appointments command).
+
+Rows are validated field by field with AppointmentImportSerializer, which
+runs no queries. Doctors and slot conflicts are then checked in memory
+against preloaded sets: every doctor id is loaded once, and for each batch
+the active slots on dates not seen yet are loaded in a single query.
+Accepted rows join the slot set, so duplicates within the file are caught
+too. Each batch is written with bulk_create in its own transaction.
+
+bulk_create skips model signals, so each batch also applies the
+counter deltas itself, drops the affected doctors' slot index days and
+bumps the Appointment cache generation.
+"""
+from django.db import IntegrityError, transaction
+from rest_framework.exceptions import ValidationError
+
+from . import counters, invalidation, slots
+from .models import Appointment, Doctor
+from .serializers import AppointmentImportSerializer
+
+SLOT_TAKEN = 'This time slot is already booked.'
+
+
+class ImportStats:
+    def __init__(self):
+        self.read = 0
+        self.imported = 0
+        self.rejected = 0
+
+
+class AppointmentImporter:
+    def __init__(self, reject, batch_size=1000, dry_run=False):
+        # reject(line, row, errors) records a row that was not imported
+        self.reject = reject
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.stats = ImportStats()
+        # One instance for all rows: building a serializer's fields per row
+        # costs more than validating the row
+        self.serializer = AppointmentImportSerializer()
+        self.doctor_ids = set(Doctor.objects.values_list('id', flat=True))
+        # Active (doctor_id, date, time) slots; doctor_id is None for open bookings
+        self.taken = set()
+        self.loaded_dates = set()
+
+    def run(self, rows, progress=None):
+        """Import (line, row dict) pairs; progress(stats) is called after each batch"""
+        batch = []
+        for line, row in rows:
+            self.stats.read += 1
+            batch.append((line, row))
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+                if progress:
+                    progress(self.stats)
+        if batch:
+            self.import_batch(batch)
+            if progress:
+                progress(self.stats)
+        return self.stats
+
+    def _reject(self, line, row, errors):
+        self.stats.rejected += 1
+        self.reject(line, row, errors)
+
+    def validate(self, batch):
+        valid = []
+        for line, row in batch:
+            if not isinstance(row, dict):
+                self._reject(line, row, {'non_field_errors': ['Not a JSON object.']})
+                continue
+            try:
+                data = self.serializer.run_validation(row)
+            except ValidationError as exc:
+                self._reject(line, row, exc.detail)
+                continue
+            if data.get('doctor') is not None and data['doctor'] not in self.doctor_ids:
+                self._reject(line, row, {'doctor': ['Unknown doctor.']})
+                continue
+            valid.append((line, row, data))
+        return valid
+
+    def load_slots(self, dates):
+        new_dates = set(dates) - self.loaded_dates
+        if not new_dates:
+            return
+        self.taken.update(
+            Appointment.objects.filter(
+                appointment_date__in=new_dates, status__in=slots.ACTIVE_STATUSES
+            ).values_list('doctor_id', 'appointment_date', 'appointment_time')
+        )
+        self.loaded_dates |= new_dates
+
+    def import_batch(self, batch):
+        valid = self.validate(batch)
+        self.load_slots(data['appointment_date'] for _, _, data in valid)
+
+        accepted = []
+        for line, row, data in valid:
+            status = data.get('status', 'pending')
+            slot = (data.get('doctor'), data['appointment_date'], data['appointment_time'])
+            if status in slots.ACTIVE_STATUSES:
+                if slot in self.taken:
+                    self._reject(line, row, {'appointment_time': [SLOT_TAKEN]})
+                    continue
+                self.taken.add(slot)
+            doctor_id = data.pop('doctor', None)
+            accepted.append((line, row, Appointment(doctor_id=doctor_id, **data)))
+
+        if self.dry_run:
+            self.stats.imported += len(accepted)
+            return
+
+        try:
+            with transaction.atomic():
+                created = Appointment.objects.bulk_create([item[2] for item in accepted])
+                self.after_write(created)
+        except IntegrityError:
+            # A booking made since the slots were loaded; retry row by row
+            created = self.write_one_by_one(accepted)
+        self.stats.imported += len(created)
+
+    def write_one_by_one(self, accepted):
+        created = []
+        with transaction.atomic():
+            for line, row, appointment in accepted:
+                try:
+                    with transaction.atomic():
+                        Appointment.objects.bulk_create([appointment])
+                except IntegrityError:
+                    self._reject(line, row, {'appointment_time': [SLOT_TAKEN]})
+                    continue
+                created.append(appointment)
+            self.after_write(created)
+        return created
+
+    def after_write(self, created):
+        """Do what the model signals would have done for these rows"""
+        counters.apply_deltas(counters.deltas_for_created(Appointment, created))
+        days = {
+            (appointment.doctor_id, appointment.appointment_date)
+            for appointment in created if appointment.doctor_id
+        }
+
+        def invalidate_slot_index():
+            for doctor_id, appointment_date in days:
+                slots.invalidate_day(doctor_id, appointment_date)
+
+        transaction.on_commit(invalidate_slot_index)
+        if created:
+            invalidation.model_changed(Appointment)
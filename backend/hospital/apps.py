@@ -4,3 +4,10 @@ from django.apps import AppConfig
 class HospitalConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hospital'
+
+    def ready(self):
+        # Register model signal handlers
+        from . import signals  # noqa: F401
+        # Views declare their cache dependencies when defined; load them so
+        # writes invalidate caches even in processes that serve no requests
+        from . import dashboard, views  # noqa: F401
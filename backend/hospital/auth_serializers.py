@@ -3,13 +3,16 @@ from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
 from rest_framework_simplejwt.tokens import RefreshToken
 
-class UserRegistrationSerializer(serializers.ModelSerializer):
+from .sanitize import SanitizedFieldsMixin
+
+class UserRegistrationSerializer(SanitizedFieldsMixin, serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, min_length=8)
     password_confirm = serializers.CharField(write_only=True)
     
     class Meta:
         model = User
         fields = ('username', 'email', 'first_name', 'last_name', 'password', 'password_confirm')
+        sanitized_fields = ('first_name', 'last_name')
     
     def validate(self, attrs):
         if attrs['password'] != attrs['password_confirm']:
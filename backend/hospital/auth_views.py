@@ -1,5 +1,4 @@
 import logging
-import bleach
 from rest_framework import generics, status
 from rest_framework.decorators import api_view, permission_classes
 from rest_framework.permissions import AllowAny, IsAuthenticated
@@ -20,7 +19,8 @@ from .auth_serializers import (
     UserLoginSerializer, 
     UserSerializer
 )
-from .middleware import LoginAttemptMiddleware
+from .middleware import clear_failed_attempts, is_locked_out, record_failed_attempt
+from .sanitize import sanitize_text
 
 logger = logging.getLogger('hospital.security')
 
@@ -41,14 +41,12 @@ class UserRegistrationView(generics.CreateAPIView):
     permission_classes = [AllowAny]
     
     def create(self, request, *args, **kwargs):
-        # Sanitize input data
-        sanitized_data = self.sanitize_input(request.data)
-        
-        serializer = self.get_serializer(data=sanitized_data)
+        # Names are sanitized by the serializer (see hospital.sanitize)
+        serializer = self.get_serializer(data=request.data)
         serializer.is_valid(raise_exception=True)
         
         # Additional password validation
-        password = sanitized_data.get('password')
+        password = serializer.validated_data.get('password')
         try:
             validate_password(password)
         except ValidationError as e:
@@ -64,16 +62,6 @@ class UserRegistrationView(generics.CreateAPIView):
             'user': UserSerializer(user).data
         }, status=status.HTTP_201_CREATED)
     
-    def sanitize_input(self, data):
-        """Sanitize user input"""
-        sanitized = {}
-        for key, value in data.items():
-            if isinstance(value, str):
-                sanitized[key] = bleach.clean(value.strip(), strip=True)
-            else:
-                sanitized[key] = value
-        return sanitized
-    
     def get_client_ip(self, request):
         """Get the real client IP address"""
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
@@ -98,12 +86,11 @@ def login_view(request):
         }, status=status.HTTP_400_BAD_REQUEST)
     
     # Sanitize username
-    username = bleach.clean(username, strip=True)
+    username = sanitize_text(username)
     
     # Check for account lockout
     client_ip = get_client_ip(request)
-    middleware = LoginAttemptMiddleware(None)
-    if middleware.is_locked_out(client_ip):
+    if is_locked_out(client_ip):
         logger.warning(f"Login attempt from locked out IP: {client_ip}")
         return Response({
             'error': 'Too many failed login attempts. Please try again later.'
@@ -118,7 +105,7 @@ def login_view(request):
             login(request, user)
             
             # Clear failed attempts
-            middleware.clear_failed_attempts(client_ip)
+            clear_failed_attempts(client_ip)
             
             # Log successful login
             logger.info(f"Successful login: {username} from IP {client_ip}")
@@ -134,7 +121,7 @@ def login_view(request):
             }, status=status.HTTP_401_UNAUTHORIZED)
     else:
         # Failed login
-        middleware.record_failed_attempt(client_ip)
+        record_failed_attempt(client_ip)
         logger.warning(f"Failed login attempt: {username} from IP {client_ip}")
         
         return Response({
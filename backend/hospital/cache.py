@@ -0,0 +1,102 @@
+"""
+Cache access layer for the hospital app.
+
+App code talks to the cache through these helpers rather than importing
+django.core.cache directly, so every key is namespaced the same way and
+counters use the backend's atomic operations. The backend itself is chosen
+in settings.CACHES: Redis (shared by all workers) when REDIS_URL is set,
+an in-process LocMemCache otherwise (local development and tests).
+
+Commands Django's cache API has no method for go through get_redis(), a
+redis-py client for the same REDIS_URL, rather than the cache backend's
+private client.
+"""
+import time
+
+import redis
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.redis import RedisCache
+
+CACHE_ALIAS = getattr(settings, 'HOSPITAL_CACHE_ALIAS', 'default')
+
+_redis_client = None
+
+
+def get_cache():
+    """Return the cache backend used by the hospital app"""
+    return caches[CACHE_ALIAS]
+
+
+def cache_key(namespace, *parts):
+    """Build a namespaced key, e.g. cache_key('lockout', ip) -> 'lockout:1.2.3.4'"""
+    return ':'.join([namespace, *(str(part) for part in parts)])
+
+
+def get_redis():
+    """
+    Return a redis-py client for settings.REDIS_URL, or None when the
+    hospital cache is not Redis. The client is shared, with a connection
+    pool configured by the cache's OPTIONS.
+    """
+    global _redis_client
+    if not settings.REDIS_URL or not isinstance(get_cache(), RedisCache):
+        return None
+    if _redis_client is None:
+        options = settings.CACHES[CACHE_ALIAS].get('OPTIONS', {})
+        _redis_client = redis.Redis.from_url(settings.REDIS_URL, **options)
+    return _redis_client
+
+
+def increment(key, timeout, delta=1):
+    """
+    Atomically increment a counter, creating it with the given timeout.
+    The expiry is set once when the counter is created, so it behaves as a
+    fixed window rather than being extended by every hit.
+    """
+    cache = get_cache()
+    client = get_redis()
+    if client is not None:
+        # SET NX EX and INCRBY in one pipeline: a single round trip, where
+        # add() + incr() would take three (incr() checks EXISTS first).
+        # The cache's own key, so get_cache().get(key) reads the counter.
+        redis_key = cache.make_and_validate_key(key)
+        pipeline = client.pipeline()
+        pipeline.set(redis_key, 0, ex=timeout, nx=True)
+        pipeline.incrby(redis_key, delta)
+        return pipeline.execute()[1]
+
+    # Other backends: the counter usually exists already, so try incr() first
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        if cache.add(key, delta, timeout):
+            return delta
+        # Created by another request in the meantime
+        return cache.incr(key, delta)
+
+
+def _new_version():
+    # Millisecond timestamps never repeat an evicted version number
+    return int(time.time() * 1000)
+
+
+def get_version(key):
+    """Return the current generation number stored at key, creating it if missing"""
+    cache = get_cache()
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(key):
+    """Advance a generation number so every key derived from it goes stale"""
+    cache = get_cache()
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = _new_version()
+        cache.set(key, version, None)
+        return version
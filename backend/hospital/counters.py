@@ -0,0 +1,239 @@
+"""
+Incrementally maintained counters for dashboard and department metrics.
+
+Each tracked model contributes 0 or 1 to a set of named counters, based on
+its field values (an active service counts towards 'active_services' and
+'department:<id>:services'). On save the signal handlers diff the row's
+contributions before and after and apply the deltas to DashboardCounter
+with F() updates, in the same transaction as the write when there is one.
+Rows are updated in name order, so two transactions moving rows between
+departments in opposite directions cannot deadlock.
+
+Every booking and inquiry touches the same few global counters
+(HOT_COUNTERS and the per-day appointment counts). Updating those inside
+the writing transaction would hold their row locks until it commits and
+serialize all concurrent bookings, so their deltas are applied right after
+commit instead, each UPDATE holding its lock only for itself. A process
+dying in between loses the delta; the hourly reconcile task (and the
+reconcile_counters command) recompute every counter from scratch.
+
+A counter row that does not exist yet is computed from the database when
+it is first read or written, so counters never start from a wrong zero.
+A write in a transaction that finds no row creates it in a savepoint,
+counting its own change, instead of skipping it: a reader seeding the row
+concurrently may not see that change yet. Whichever INSERT loses the race
+falls back to applying its delta. After commit the computed value already
+includes the change.
+"""
+from datetime import date
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q
+from django.utils import timezone
+
+from .models import (
+    Appointment, ContactInquiry, DashboardCounter, Department, Doctor, Service
+)
+
+
+# Global counters nearly every booking or inquiry changes
+HOT_COUNTERS = {'pending_appointments', 'unresolved_inquiries'}
+
+
+def department_counter(department_id, kind):
+    return f'department:{department_id}:{kind}'
+
+
+def appointments_on_counter(day):
+    return f'appointments_on:{day.isoformat()}'
+
+
+# Fields each tracked model's contributions depend on, and the contributions
+TRACKED_FIELDS = {
+    Department: ['is_active'],
+    Service: ['is_active', 'department_id'],
+    Doctor: ['is_active', 'department_id'],
+    Appointment: ['status', 'appointment_date'],
+    ContactInquiry: ['is_resolved'],
+}
+
+
+def contributions(model, values):
+    """Counter increments a single row with these field values contributes"""
+    if model is Department:
+        return {'active_departments': int(values['is_active'])}
+    if model is Service:
+        return {
+            'active_services': int(values['is_active']),
+            department_counter(values['department_id'], 'services'): int(values['is_active']),
+        }
+    if model is Doctor:
+        return {
+            'active_doctors': int(values['is_active']),
+            department_counter(values['department_id'], 'doctors'): int(values['is_active']),
+        }
+    if model is Appointment:
+        return {
+            'pending_appointments': int(values['status'] == 'pending'),
+            appointments_on_counter(values['appointment_date']): 1,
+        }
+    if model is ContactInquiry:
+        return {'unresolved_inquiries': int(not values['is_resolved'])}
+    return {}
+
+
+def is_hot(name):
+    return name in HOT_COUNTERS or name.startswith('appointments_on:')
+
+
+def current_values(instance):
+    # An unsaved instance may still hold the strings it was created with
+    meta = instance._meta
+    return {
+        field: meta.get_field(field).to_python(getattr(instance, field))
+        for field in TRACKED_FIELDS[type(instance)]
+    }
+
+
+def deltas_between(model, previous, current):
+    """Counter deltas for a row changing from previous to current values (either may be None)"""
+    deltas = {}
+    if previous is not None:
+        for name, value in contributions(model, previous).items():
+            deltas[name] = deltas.get(name, 0) - value
+    if current is not None:
+        for name, value in contributions(model, current).items():
+            deltas[name] = deltas.get(name, 0) + value
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+def deltas_for_created(model, instances):
+    """Combined counter deltas for rows inserted without signals (bulk_create)"""
+    deltas = {}
+    for instance in instances:
+        for name, value in contributions(model, current_values(instance)).items():
+            deltas[name] = deltas.get(name, 0) + value
+    return {name: delta for name, delta in deltas.items() if delta}
+
+
+def add_to_counter(name, delta, now):
+    """Add delta to a stored counter; False if its row doesn't exist"""
+    return bool(DashboardCounter.objects.filter(name=name).update(
+        value=F('value') + delta, updated_at=now
+    ))
+
+
+def apply_deltas(deltas):
+    """
+    Add deltas to the counter rows, creating missing rows from the database.
+    Call after the change is written, in its transaction, so the count
+    seeding a new row already includes it. Hot counters are only updated
+    once that transaction commits.
+    """
+    if not deltas:
+        return
+    hot = {name: delta for name, delta in deltas.items() if is_hot(name)}
+    now = timezone.now()
+    with transaction.atomic():
+        for name, delta in sorted(deltas.items()):
+            if name in hot or add_to_counter(name, delta, now):
+                continue
+            try:
+                with transaction.atomic():
+                    DashboardCounter.objects.create(name=name, value=compute_counter(name))
+            except IntegrityError:
+                # Seeded concurrently, without our change
+                add_to_counter(name, delta, now)
+    if hot:
+        transaction.on_commit(lambda: apply_committed_deltas(hot))
+
+
+def apply_committed_deltas(deltas):
+    """Add deltas of a committed change to the counter rows, one short UPDATE each"""
+    now = timezone.now()
+    for name, delta in sorted(deltas.items()):
+        if not add_to_counter(name, delta, now):
+            # Counted from the database, which already holds the change
+            DashboardCounter.objects.bulk_create(
+                [DashboardCounter(name=name, value=compute_counter(name))], ignore_conflicts=True
+            )
+
+
+def compute_counter(name):
+    """Count a single counter's value from the source tables"""
+    if name == 'active_departments':
+        return Department.objects.filter(is_active=True).count()
+    if name == 'active_services':
+        return Service.objects.filter(is_active=True).count()
+    if name == 'active_doctors':
+        return Doctor.objects.filter(is_active=True).count()
+    if name == 'pending_appointments':
+        return Appointment.objects.filter(status='pending').count()
+    if name == 'unresolved_inquiries':
+        return ContactInquiry.objects.filter(is_resolved=False).count()
+    if name.startswith('appointments_on:'):
+        day = date.fromisoformat(name.split(':', 1)[1])
+        return Appointment.objects.filter(appointment_date=day).count()
+    if name.startswith('department:'):
+        _, department_id, kind = name.split(':')
+        model = Service if kind == 'services' else Doctor
+        return model.objects.filter(department_id=department_id, is_active=True).count()
+    raise ValueError(f'Unknown counter: {name}')
+
+
+def get_counters(names):
+    """Return {name: value} for the given counters in one query, filling in missing ones"""
+    names = list(names)
+    values = dict(
+        DashboardCounter.objects.filter(name__in=names).values_list('name', 'value')
+    )
+    missing = [name for name in names if name not in values]
+    if missing:
+        computed = {name: compute_counter(name) for name in missing}
+        DashboardCounter.objects.bulk_create(
+            [DashboardCounter(name=name, value=value) for name, value in computed.items()],
+            ignore_conflicts=True,
+        )
+        values.update(computed)
+    return values
+
+
+def compute_all_counters():
+    """Recompute every counter from the source tables"""
+    values = {
+        'active_departments': compute_counter('active_departments'),
+        'active_services': compute_counter('active_services'),
+        'active_doctors': compute_counter('active_doctors'),
+        'pending_appointments': compute_counter('pending_appointments'),
+        'unresolved_inquiries': compute_counter('unresolved_inquiries'),
+    }
+    # Separate queries so the two joins don't multiply each other's counts
+    services = Department.objects.annotate(
+        total=Count('services', filter=Q(services__is_active=True))
+    ).values_list('id', 'total')
+    doctors = Department.objects.annotate(
+        total=Count('doctors', filter=Q(doctors__is_active=True))
+    ).values_list('id', 'total')
+    for department_id, total in services:
+        values[department_counter(department_id, 'services')] = total
+    for department_id, total in doctors:
+        values[department_counter(department_id, 'doctors')] = total
+
+    per_day = Appointment.objects.order_by().values('appointment_date').annotate(
+        total=Count('id')
+    ).values_list('appointment_date', 'total')
+    for day, total in per_day:
+        values[appointments_on_counter(day)] = total
+    return values
+
+
+def reconcile_counters():
+    """Replace all stored counters with freshly computed values; returns them"""
+    values = compute_all_counters()
+    with transaction.atomic():
+        DashboardCounter.objects.all().delete()
+        DashboardCounter.objects.bulk_create(
+            [DashboardCounter(name=name, value=value) for name, value in values.items()],
+            batch_size=1000,
+        )
+    return values
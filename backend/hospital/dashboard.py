@@ -0,0 +1,59 @@
+"""
+Admin dashboard statistics.
+
+Counts are read from the incrementally maintained counters table (see
+counters.py) in one query. Active announcements depend on the clock as
+well as on writes, so they come from the announcement cache instead.
+The result is cached for DASHBOARD_STATS_CACHE_TIMEOUT seconds, so several
+admin tabs polling the dashboard share one computation. The cache key
+carries the counted models' generations, so a write to any of them makes
+the next request recompute (see invalidation.py).
+"""
+from django.conf import settings
+from django.utils import timezone
+
+from . import announcements, counters, invalidation
+from .cache import cache_key, get_cache
+from .models import (
+    Department, Service, Doctor, Appointment, ContactInquiry, Announcement
+)
+
+DASHBOARD_STATS_CACHE_TIMEOUT = getattr(settings, 'DASHBOARD_STATS_CACHE_TIMEOUT', 5)
+
+# Models whose writes change the statistics
+COUNTED_MODELS = invalidation.register(
+    'dashboard_stats', Department, Service, Doctor, Appointment, ContactInquiry, Announcement
+)
+
+
+def stats_key():
+    return cache_key('dashboard_stats', *invalidation.generations(COUNTED_MODELS))
+
+
+def compute_dashboard_stats():
+    """Compute the dashboard statistics from the counters table"""
+    today = counters.appointments_on_counter(timezone.localdate())
+    values = counters.get_counters([
+        'active_departments', 'active_services', 'active_doctors',
+        'pending_appointments', 'unresolved_inquiries', today,
+    ])
+    return {
+        'total_departments': values['active_departments'],
+        'total_services': values['active_services'],
+        'total_doctors': values['active_doctors'],
+        'pending_appointments': values['pending_appointments'],
+        'today_appointments': values[today],
+        'unresolved_inquiries': values['unresolved_inquiries'],
+        'active_announcements': len(announcements.active_announcement_ids()),
+    }
+
+
+def get_dashboard_stats():
+    """Return cached dashboard statistics, recomputing them when expired"""
+    cache = get_cache()
+    key = stats_key()
+    stats = cache.get(key)
+    if stats is None:
+        stats = compute_dashboard_stats()
+        cache.set(key, stats, DASHBOARD_STATS_CACHE_TIMEOUT)
+    return stats
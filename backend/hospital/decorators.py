@@ -1,10 +1,11 @@
 from functools import wraps
 from django.http import JsonResponse
-from django.core.cache import cache
 from django.conf import settings
-import time
+from rest_framework.exceptions import Throttled
 import logging
 
+from .ratelimit import RateLimiter
+
 logger = logging.getLogger('hospital.security')
 
 def api_key_required(view_func):
@@ -22,27 +23,24 @@ def api_key_required(view_func):
         return view_func(request, *args, **kwargs)
     return wrapper
 
-def rate_limit_ip(max_requests=10, time_window=60):
-    """Simple rate limiting by IP"""
+def check_rate_limit(request, scope, rate=None):
+    """
+    Count a request against the limiter configured for scope, raising
+    Throttled when the client is over it. DRF renders that the same way as
+    its throttle classes do, so every endpoint answers 429 alike.
+    """
+    ip = get_client_ip(request)
+    limiter = RateLimiter(scope, rate)
+    if not limiter.allow(ip):
+        logger.warning(f"Rate limit exceeded for {ip} on {scope}")
+        raise Throttled(wait=limiter.retry_after())
+
+def rate_limit(scope, rate=None):
+    """Rate limit an @api_view function by client IP using the limiter configured for scope"""
     def decorator(view_func):
         @wraps(view_func)
         def wrapper(request, *args, **kwargs):
-            ip = get_client_ip(request)
-            cache_key = f'rate_limit_{ip}_{view_func.__name__}'
-            
-            requests = cache.get(cache_key, [])
-            now = time.time()
-            
-            # Remove old requests
-            requests = [req_time for req_time in requests if now - req_time < time_window]
-            
-            if len(requests) >= max_requests:
-                logger.warning(f"Rate limit exceeded for {ip} on {view_func.__name__}")
-                return JsonResponse({'error': 'Rate limit exceeded'}, status=429)
-            
-            requests.append(now)
-            cache.set(cache_key, requests, time_window)
-            
+            check_rate_limit(request, scope, rate)
             return view_func(request, *args, **kwargs)
         return wrapper
     return decorator
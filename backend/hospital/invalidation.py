@@ -0,0 +1,109 @@
+"""
+Model-driven cache invalidation.
+
+Caches declare which models their entries are built from:
+
+    invalidation.register('dashboard_stats', Department, Service, Doctor)
+
+Each registered model has a generation number in the cache. A cache builds
+its keys from the generations of its dependencies (generations()), and
+every committed save or delete of a registered model bumps that model's
+generation (see signals.py). Dependent entries then simply stop being read:
+invalidation is one counter increment per model, with no key scans or
+deletes, and stale entries expire on their own.
+
+Bulk edits (for example an admin changelist saving many rows) can run
+inside deferred() so each model is bumped once instead of once per row.
+"""
+import threading
+import time
+from contextlib import contextmanager
+
+from django.db import transaction
+from django.db.models import Max
+
+from .cache import bump_version, cache_key, get_cache, get_version
+
+# model -> names of the caches that depend on it
+_dependents = {}
+
+_local = threading.local()
+
+
+def register(name, *models):
+    """Declare that the cache called name is built from models"""
+    for model in models:
+        _dependents.setdefault(model, set()).add(name)
+    return models
+
+
+def dependents(model):
+    return _dependents.get(model, set())
+
+
+def is_tracked(model):
+    return model in _dependents
+
+
+def _generation_key(model):
+    return cache_key('generation', model._meta.label_lower)
+
+
+def _modified_key(model):
+    return cache_key('modified', model._meta.label_lower)
+
+
+def generations(models):
+    """Current generation of each model, in order; use them as key parts"""
+    keys = [_generation_key(model) for model in models]
+    stored = get_cache().get_many(keys)
+    return [stored[key] if key in stored else get_version(key) for key in keys]
+
+
+def last_modified(models):
+    """Unix timestamp of the latest committed write to any of the models (0 if none)"""
+    cache = get_cache()
+    keys = {model: _modified_key(model) for model in models}
+    stored = cache.get_many(keys.values())
+    latest = 0
+    for model, key in keys.items():
+        timestamp = stored.get(key)
+        if timestamp is None:
+            # No write recorded since the cache was cleared; ask the table
+            updated = model._default_manager.aggregate(latest=Max('updated_at'))['latest']
+            timestamp = int(updated.timestamp()) if updated else 0
+            cache.add(key, timestamp, None)
+        latest = max(latest, timestamp)
+    return latest
+
+
+def touch(model):
+    """Start a new generation for model and record the write time"""
+    get_cache().set(_modified_key(model), int(time.time()), None)
+    bump_version(_generation_key(model))
+
+
+def model_changed(model):
+    """Bump model's generation once the current transaction commits"""
+    batch = getattr(_local, 'batch', None)
+    if batch is not None:
+        batch.add(model)
+    else:
+        transaction.on_commit(lambda: touch(model))
+
+
+@contextmanager
+def deferred():
+    """Collect changes made inside the block and bump each model once at the end"""
+    if getattr(_local, 'batch', None) is not None:
+        # Nested: the outer block flushes
+        yield
+        return
+    _local.batch = changed = set()
+    try:
+        yield
+    finally:
+        # Flush on errors too: rows saved before the error may have committed
+        _local.batch = None
+        for model in changed:
+            transaction.on_commit(lambda model=model: touch(model))
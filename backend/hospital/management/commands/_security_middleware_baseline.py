@@ -0,0 +1,104 @@
+"""
+The per-request security middleware as it was before RequestSecurityMiddleware
+replaced it, kept only so benchmark_security_middleware can time the old
+pipeline against the new one. Not installed anywhere; the failed login
+signal handler is left out so importing this does not count attempts twice.
+
+SecurityLoggingMiddleware sat before SessionMiddleware and
+AuthenticationMiddleware, LoginAttemptMiddleware after them:
+
+    SecurityLoggingMiddleware, SessionMiddleware, AuthenticationMiddleware,
+    LoginAttemptMiddleware
+"""
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import JsonResponse
+
+logger = logging.getLogger('hospital.security')
+
+
+class SecurityLoggingMiddleware:
+    """Log security-related events"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Log suspicious activities
+        self.log_suspicious_activity(request)
+
+        response = self.get_response(request)
+        return response
+
+    def log_suspicious_activity(self, request):
+        """Log potentially suspicious activities"""
+        user_ip = self.get_client_ip(request)
+
+        # Log admin access attempts by non-staff users
+        if request.path.startswith('/admin') and request.user.is_authenticated and not request.user.is_staff:
+            logger.warning(f"Unauthorized admin access attempt from {user_ip} by user {request.user.username}")
+
+        # Log multiple rapid requests (potential DoS)
+        cache_key = f"request_count_{user_ip}"
+        request_count = cache.get(cache_key, 0)
+        if request_count > 100:  # More than 100 requests per minute
+            logger.warning(f"High request rate from {user_ip}: {request_count} requests/minute")
+
+        cache.set(cache_key, request_count + 1, 60)  # Reset every minute
+
+    def get_client_ip(self, request):
+        """Get the real client IP address"""
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if x_forwarded_for:
+            ip = x_forwarded_for.split(',')[0]
+        else:
+            ip = request.META.get('REMOTE_ADDR')
+        return ip
+
+
+class LoginAttemptMiddleware:
+    """Track and limit login attempts"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Check if user is locked out before processing login
+        if request.path == '/api/auth/login/' and request.method == 'POST':
+            user_ip = self.get_client_ip(request)
+            if self.is_locked_out(user_ip):
+                logger.warning(f"Login attempt from locked out IP: {user_ip}")
+                return JsonResponse({
+                    'error': 'Too many failed login attempts. Please try again later.'
+                }, status=429)
+
+        response = self.get_response(request)
+        return response
+
+    def get_client_ip(self, request):
+        """Get the real client IP address"""
+        x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
+        if x_forwarded_for:
+            ip = x_forwarded_for.split(',')[0]
+        else:
+            ip = request.META.get('REMOTE_ADDR')
+        return ip
+
+    def is_locked_out(self, ip):
+        """Check if IP is currently locked out"""
+        cache_key = f"lockout_{ip}"
+        return cache.get(cache_key, False)
+
+    def record_failed_attempt(self, ip):
+        """Record a failed login attempt"""
+        cache_key = f"failed_attempts_{ip}"
+        attempts = cache.get(cache_key, 0) + 1
+        cache.set(cache_key, attempts, settings.LOCKOUT_DURATION)
+
+        if attempts >= settings.MAX_LOGIN_ATTEMPTS:
+            # Lock out the IP
+            lockout_key = f"lockout_{ip}"
+            cache.set(lockout_key, True, settings.LOCKOUT_DURATION)
+            logger.warning(f"IP {ip} locked out after {attempts} failed login attempts")
@@ -0,0 +1,135 @@
+import random
+import time
+from datetime import date, time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from hospital.models import Appointment, Department, Doctor
+
+
+class Command(BaseCommand):
+    help = (
+        'Seed synthetic appointments and print query plans for the appointment '
+        'hot paths with and without the indexes. Runs in a scratch copy of the '
+        'database (test_<NAME>, as the test runner creates it), which is '
+        'dropped afterwards; the configured database is never touched.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1_000_000, help='Synthetic appointments to insert')
+        parser.add_argument('--doctors', type=int, default=50, help='Synthetic doctors to spread them over')
+        parser.add_argument('--batch-size', type=int, default=10_000, help='bulk_create batch size')
+        parser.add_argument(
+            '--noinput', '--no-input', action='store_false', dest='interactive',
+            help='Replace a scratch database left over from an earlier run without asking'
+        )
+
+    def handle(self, *args, **options):
+        # Seeding and DROP INDEX would lock the live appointments table for
+        # the whole run, so work in a freshly migrated scratch database
+        database_name = connection.settings_dict['NAME']
+        scratch = connection.creation.create_test_db(
+            verbosity=0, autoclobber=not options['interactive'], serialize=False
+        )
+        self.stdout.write(f'Benchmarking in scratch database {scratch}')
+        try:
+            doctors = self.seed(options['rows'], options['doctors'], options['batch_size'])
+            self.analyze()
+            queries = self.hot_queries(doctors[0])
+
+            self.stdout.write(self.style.MIGRATE_HEADING('\nWith indexes'))
+            self.explain_all(queries)
+
+            self.drop_indexes()
+            self.analyze()
+            self.stdout.write(self.style.MIGRATE_HEADING('\nWithout indexes'))
+            self.explain_all(queries)
+        finally:
+            connection.creation.destroy_test_db(database_name, verbosity=0)
+        self.stdout.write(self.style.SUCCESS(f'\nDropped scratch database {scratch}'))
+
+    def seed(self, rows, doctor_count, batch_size):
+        self.stdout.write(f'Seeding {rows} appointments over {doctor_count} doctors...')
+        started = time.perf_counter()
+        department = Department.objects.create(name='Index Benchmark', description='Synthetic')
+        doctors = [
+            Doctor.objects.create(
+                first_name='Bench', last_name=str(i), email=f'bench-{i}@example.com',
+                phone='+919000000000', gender='O', date_of_birth=date(1980, 1, 1),
+                medical_license=f'BENCH-{i}', specialization='General', department=department,
+                years_of_experience=1, qualifications='MBBS', bio='Synthetic', consultation_fee=0,
+            )
+            for i in range(doctor_count)
+        ]
+
+        # Fill 16 half-hour slots per doctor per day, starting 3 years back
+        start = date.today() - timedelta(days=3 * 365)
+        statuses = ['completed'] * 6 + ['cancelled', 'no_show', 'confirmed', 'pending']
+        slots_per_day = 16
+        batch = []
+        for i in range(rows):
+            doctor = doctors[i % doctor_count]
+            slot = (i // doctor_count) % slots_per_day
+            day = start + timedelta(days=i // (doctor_count * slots_per_day))
+            status = random.choice(statuses)
+            if day < date.today() and status in Appointment.ACTIVE_STATUSES:
+                status = 'completed'
+            batch.append(Appointment(
+                patient_name=f'Patient {i}', patient_email='patient@example.com',
+                patient_phone='+919000000000', patient_age=40, patient_gender='O',
+                doctor=doctor, appointment_date=day,
+                appointment_time=dt_time(9 + slot // 2, 30 * (slot % 2)),
+                reason='Synthetic', status=status,
+            ))
+            if len(batch) >= batch_size:
+                Appointment.objects.bulk_create(batch)
+                batch = []
+        if batch:
+            Appointment.objects.bulk_create(batch)
+
+        self.stdout.write(f'Seeded in {time.perf_counter() - started:.1f}s')
+        return doctors
+
+    def analyze(self):
+        with connection.cursor() as cursor:
+            cursor.execute(f'ANALYZE {Appointment._meta.db_table}')
+
+    def hot_queries(self, doctor):
+        today = date.today()
+        slot_day = today + timedelta(days=1)
+        return {
+            'Booking conflict check': Appointment.objects.filter(
+                doctor=doctor, appointment_date=slot_day, appointment_time=dt_time(10, 0),
+                status__in=Appointment.ACTIVE_STATUSES,
+            ),
+            'Slot index build (doctor day)': Appointment.objects.filter(
+                doctor=doctor, appointment_date=slot_day, status__in=Appointment.ACTIVE_STATUSES,
+            ).values_list('appointment_time'),
+            # COUNT queries carry no ORDER BY
+            'Dashboard: pending appointments': Appointment.objects.filter(
+                status='pending'
+            ).order_by().values('id'),
+            "Dashboard: today's appointments": Appointment.objects.filter(
+                appointment_date=today
+            ).order_by().values('id'),
+            'Appointment list first page': Appointment.objects.order_by(
+                '-appointment_date', '-appointment_time'
+            )[:20],
+        }
+
+    def explain_all(self, queries):
+        for label, queryset in queries.items():
+            started = time.perf_counter()
+            list(queryset.all())
+            elapsed = (time.perf_counter() - started) * 1000
+            self.stdout.write(self.style.SUCCESS(f'\n{label} ({elapsed:.1f} ms)'))
+            self.stdout.write(queryset.explain())
+
+    def drop_indexes(self):
+        # Partial unique constraints are unique indexes on both PostgreSQL and SQLite
+        meta = Appointment._meta
+        names = [index.name for index in meta.indexes] + [c.name for c in meta.constraints]
+        with connection.cursor() as cursor:
+            for name in names:
+                cursor.execute(f'DROP INDEX {connection.ops.quote_name(name)}')
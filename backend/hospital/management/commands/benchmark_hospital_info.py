@@ -0,0 +1,65 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import override_settings
+from django.urls import reverse
+from rest_framework.test import APIRequestFactory
+
+from hospital.models import HospitalInfo
+from hospital.views import HospitalInfoView
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure view-level requests per second for the hospital info endpoint '
+        'without caching, with the shared response cache and with the '
+        'process-local cache'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000, help='Requests per mode')
+
+    def handle(self, *args, **options):
+        if not HospitalInfo.objects.exists():
+            raise CommandError('Create a HospitalInfo row first')
+
+        hosts = [host for host in settings.ALLOWED_HOSTS if host and '*' not in host]
+        host = hosts[0] if hosts else 'localhost'
+        factory = APIRequestFactory()
+        path = reverse('hospital-info')
+        view = HospitalInfoView.as_view()
+
+        local_store = HospitalInfoView._local_store
+        throttle_classes = HospitalInfoView.throttle_classes
+        modes = [
+            ('No cache', False, local_store),
+            ('Shared response cache', True, None),
+            ('Process-local cache', True, local_store),
+        ]
+        # Rate limits would reject most of the benchmark's requests
+        HospitalInfoView.throttle_classes = []
+        try:
+            for label, enabled, store in modes:
+                HospitalInfoView._local_store = store
+                with override_settings(RESPONSE_CACHE_ENABLED=enabled):
+                    rate = self.measure(view, factory, path, host, options['requests'])
+                self.stdout.write(f'{label}: {rate:,.0f} requests/s')
+        finally:
+            HospitalInfoView._local_store = local_store
+            HospitalInfoView.throttle_classes = throttle_classes
+
+    def measure(self, view, factory, path, host, count):
+        # Warm up so the cached modes are measured with their cache populated
+        self.request(view, factory, path, host)
+        started = time.perf_counter()
+        for _ in range(count):
+            self.request(view, factory, path, host)
+        return count / (time.perf_counter() - started)
+
+    def request(self, view, factory, path, host):
+        response = view(factory.get(path, HTTP_HOST=host))
+        # Uncached responses are rendered lazily; cache hits are already bytes
+        if hasattr(response, 'render'):
+            response.render()
+        return response
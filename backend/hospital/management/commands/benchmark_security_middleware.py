@@ -0,0 +1,78 @@
+import logging
+import time
+
+from django.conf import settings
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.sessions.middleware import SessionMiddleware
+from django.core.management.base import BaseCommand
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.urls import reverse
+
+from hospital.middleware import RequestSecurityMiddleware
+
+from ._security_middleware_baseline import LoginAttemptMiddleware, SecurityLoggingMiddleware
+
+
+class Command(BaseCommand):
+    help = (
+        'Measure the per-request overhead of the security middleware on an API '
+        'path, an exempt path and an admin path: the pipeline it replaced '
+        '(SecurityLoggingMiddleware and LoginAttemptMiddleware) against '
+        'RequestSecurityMiddleware, each over the same session and '
+        'authentication middleware without either'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20000, help='Requests per path')
+        parser.add_argument('--clients', type=int, default=200, help='Distinct client IPs')
+        parser.add_argument('--rounds', type=int, default=5, help='Best of this many runs')
+
+    def handle(self, *args, **options):
+        def view(request):
+            return HttpResponse()
+
+        bare = SessionMiddleware(AuthenticationMiddleware(view))
+        # In the order the old MIDDLEWARE setting listed them
+        before = SecurityLoggingMiddleware(
+            SessionMiddleware(AuthenticationMiddleware(LoginAttemptMiddleware(view)))
+        )
+        after = SessionMiddleware(AuthenticationMiddleware(RequestSecurityMiddleware(view)))
+
+        paths = [
+            ('API', reverse('doctor-list')),
+            ('Exempt', settings.SECURITY_EXEMPT_PATHS[0]),
+            ('Admin', reverse('admin:index')),
+        ]
+        # High request rate warnings would dominate the timings
+        logging.disable(logging.WARNING)
+        try:
+            for label, path in paths:
+                base = self.best_of(bare, path, options)
+                old = self.best_of(before, path, options) - base
+                new = self.best_of(after, path, options) - base
+                self.stdout.write(
+                    f'{label} ({path}): before {old * 1e6:.1f} µs/request, '
+                    f'after {new * 1e6:.1f} µs/request'
+                )
+        finally:
+            logging.disable(logging.NOTSET)
+
+    def build_requests(self, path, count, clients):
+        factory = RequestFactory()
+        return [
+            factory.get(path, REMOTE_ADDR=f'10.0.{i % clients // 256}.{i % clients % 256}')
+            for i in range(count)
+        ]
+
+    def best_of(self, handler, path, options):
+        return min(
+            self.measure(handler, self.build_requests(path, options['requests'], options['clients']))
+            for _ in range(options['rounds'])
+        )
+
+    def measure(self, handler, requests):
+        started = time.perf_counter()
+        for request in requests:
+            handler(request)
+        return (time.perf_counter() - started) / len(requests)
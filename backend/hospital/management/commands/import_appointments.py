@@ -0,0 +1,85 @@
+import csv
+import json
+import time
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from hospital.appointment_import import AppointmentImporter
+
+
+class Command(BaseCommand):
+    help = (
+        'Import appointments from a CSV or JSON Lines file in batches. '
+        'Rows that fail validation or hit a booked slot go to a reject file.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (with a header row) or JSON Lines file')
+        parser.add_argument('--format', choices=['csv', 'jsonl'], help='Defaults to the file extension')
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows per bulk_create transaction')
+        parser.add_argument('--rejects', help='Reject file path (default: <path>.rejects.<format>)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate only; write nothing')
+
+    def handle(self, *args, **options):
+        path = Path(options['path'])
+        if not path.exists():
+            raise CommandError(f'{path} does not exist')
+        file_format = options['format'] or ('jsonl' if path.suffix in ('.jsonl', '.ndjson') else 'csv')
+        rejects_path = Path(options['rejects'] or f'{path}.rejects.{file_format}')
+
+        started = time.perf_counter()
+        with path.open(newline='', encoding='utf-8') as source, \
+                rejects_path.open('w', newline='', encoding='utf-8') as rejects:
+            if file_format == 'csv':
+                reader = csv.DictReader(source)
+                rows = self.csv_rows(reader)
+                writer = csv.DictWriter(rejects, fieldnames=[*(reader.fieldnames or []), 'line', 'errors'])
+                writer.writeheader()
+
+                def reject(line, row, errors):
+                    writer.writerow({**row, 'line': line, 'errors': json.dumps(errors)})
+            else:
+                rows = self.jsonl_rows(source)
+
+                def reject(line, row, errors):
+                    rejects.write(json.dumps({'line': line, 'row': row, 'errors': errors}) + '\n')
+
+            importer = AppointmentImporter(
+                reject, batch_size=options['batch_size'], dry_run=options['dry_run']
+            )
+            stats = importer.run(rows, progress=lambda stats: self.progress(stats, started))
+
+        elapsed = time.perf_counter() - started
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {stats.imported} of {stats.read} rows in {elapsed:.1f}s '
+            f'({stats.read / elapsed if elapsed else 0:,.0f} rows/s); {stats.rejected} rejected'
+        ))
+        if stats.rejected:
+            self.stdout.write(f'Rejected rows written to {rejects_path}')
+
+    def csv_rows(self, reader):
+        for row in reader:
+            # Blank cells fall back to model defaults; stray columns are dropped
+            yield reader.line_num, {
+                key: value for key, value in row.items() if key is not None and value != ''
+            }
+
+    def jsonl_rows(self, source):
+        for line, text in enumerate(source, start=1):
+            if not text.strip():
+                continue
+            try:
+                row = json.loads(text)
+            except ValueError:
+                # Rejected by the importer as not being an object
+                row = text.rstrip('\n')
+            yield line, row
+
+    def progress(self, stats, started):
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'  {stats.read} read, {stats.imported} imported, {stats.rejected} rejected '
+            f'({stats.read / elapsed if elapsed else 0:,.0f} rows/s)'
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from hospital.counters import reconcile_counters
+
+
+class Command(BaseCommand):
+    help = 'Recompute every dashboard counter from the source tables'
+
+    def handle(self, *args, **options):
+        values = reconcile_counters()
+        for name in ('active_departments', 'active_services', 'active_doctors',
+                     'pending_appointments', 'unresolved_inquiries'):
+            self.stdout.write(f'{name}: {values[name]}')
+        self.stdout.write(self.style.SUCCESS(f'Reconciled {len(values)} counters'))
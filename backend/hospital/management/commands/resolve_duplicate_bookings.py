@@ -0,0 +1,77 @@
+import logging
+from collections import defaultdict
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from hospital.models import Appointment
+
+logger = logging.getLogger(__name__)
+
+# Columns that exist before migration 0005, which refuses to run while
+# duplicates remain; later columns and tables (counters, outbox) may not yet
+COLUMNS = [
+    'id', 'doctor_id', 'appointment_date', 'appointment_time', 'status',
+    'patient_name', 'patient_email', 'patient_phone',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'List slots holding more than one active booking, which block the slot '
+        'constraints (migration 0005). With --cancel, keep one booking per slot '
+        '(a confirmed one if any, else the earliest) and cancel the others.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--cancel', action='store_true',
+            help='Cancel the extra bookings; without it nothing is changed'
+        )
+
+    def handle(self, *args, **options):
+        groups = self.duplicate_groups()
+        if not groups:
+            self.stdout.write(self.style.SUCCESS('No slot has more than one active booking'))
+            return
+
+        cancelled = 0
+        for (doctor_id, appointment_date, appointment_time), bookings in groups.items():
+            kept, *extra = sorted(bookings, key=lambda booking: (booking['status'] != 'confirmed', booking['id']))
+            self.stdout.write(
+                f"Doctor {doctor_id or '(none)'} on {appointment_date} at {appointment_time}: "
+                f"keeping #{kept['id']} ({kept['patient_name']}, {kept['status']})"
+            )
+            for booking in extra:
+                self.stdout.write(
+                    f"  {'cancelling' if options['cancel'] else 'would cancel'} #{booking['id']} "
+                    f"({booking['patient_name']}, {booking['patient_email']}, {booking['patient_phone']})"
+                )
+                if options['cancel']:
+                    self.cancel(booking['id'], kept['id'])
+                    cancelled += 1
+
+        if options['cancel']:
+            self.stdout.write(self.style.SUCCESS(
+                f'Cancelled {cancelled} bookings; let these patients know before migrating'
+            ))
+        else:
+            self.stdout.write('Nothing changed; run again with --cancel to cancel the extra bookings')
+
+    def duplicate_groups(self):
+        groups = defaultdict(list)
+        for booking in Appointment.objects.filter(
+            status__in=['pending', 'confirmed']
+        ).order_by('id').values(*COLUMNS):
+            groups[(booking['doctor_id'], booking['appointment_date'], booking['appointment_time'])].append(booking)
+        return {slot: bookings for slot, bookings in groups.items() if len(bookings) > 1}
+
+    def cancel(self, pk, kept_pk):
+        note = f'Cancelled as a duplicate booking: appointment #{kept_pk} holds this slot.'
+        with transaction.atomic():
+            appointment = Appointment.objects.select_for_update().only('notes').get(pk=pk)
+            notes = f'{appointment.notes}\n{note}' if appointment.notes else note
+            # update() rather than save(): the signal handlers need tables
+            # that only exist once the migrations have run
+            Appointment.objects.filter(pk=pk).update(status='cancelled', notes=notes)
+        logger.warning(f'Cancelled appointment #{pk} as a duplicate of #{kept_pk}')
@@ -0,0 +1,68 @@
+import signal
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from hospital import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        'Deliver outbox events continuously: claim due events in batches '
+        '(FOR UPDATE SKIP LOCKED, so several relays can run), send each batch '
+        'concurrently and mark the events done. Stops cleanly on SIGINT/SIGTERM.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE)
+        parser.add_argument(
+            '--concurrency', type=int, default=settings.OUTBOX_CONCURRENCY,
+            help='Threads sending each batch'
+        )
+        parser.add_argument(
+            '--poll-interval', type=float, default=1.0,
+            help='Seconds to wait when no events are due'
+        )
+        parser.add_argument(
+            '--metrics-interval', type=float, default=60.0,
+            help='Seconds between throughput and lag reports'
+        )
+        parser.add_argument('--once', action='store_true', help='Exit when no events are due')
+
+    def handle(self, *args, **options):
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        processed = 0
+        reported_at = time.monotonic()
+        while not self.stopping:
+            # A long-running loop has no request cycle to recycle connections
+            close_old_connections()
+            count = outbox.dispatch(options['batch_size'], options['concurrency'])
+            processed += count
+
+            if time.monotonic() - reported_at >= options['metrics_interval']:
+                self.report(processed, time.monotonic() - reported_at)
+                processed = 0
+                reported_at = time.monotonic()
+
+            if count < options['batch_size']:
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+
+        self.report(processed, time.monotonic() - reported_at)
+
+    def stop(self, signum, frame):
+        # Finish the batch in progress, then exit
+        self.stopping = True
+
+    def report(self, processed, elapsed):
+        stats = outbox.metrics()
+        self.stdout.write(
+            f"Relayed {processed} events ({processed / max(elapsed, 0.001):,.1f}/s); "
+            f"pending {stats['pending']}, failed {stats['failed']}, lag {stats['lag_seconds']}s"
+        )
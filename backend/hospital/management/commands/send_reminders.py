@@ -0,0 +1,21 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from hospital.reminders import send_due_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        'Queue the day-before and hour-before reminders due for confirmed '
+        'appointments; run it every few minutes (the Celery beat schedule runs '
+        'the same check as hospital.tasks.send_appointment_reminders)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.REMINDER_BATCH_SIZE)
+
+    def handle(self, *args, **options):
+        sent = send_due_reminders(batch_size=options['batch_size'])
+        self.stdout.write(
+            f"Queued {sent['day']} day-before and {sent['hour']} hour-before reminders"
+        )
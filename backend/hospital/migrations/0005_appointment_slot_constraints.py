@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2026-10-17 21:36
+
+from django.db import migrations, models
+
+ACTIVE_STATUSES = ['pending', 'confirmed']
+
+
+def check_duplicate_bookings(apps, schema_editor):
+    """
+    Databases written before the constraints existed can hold several
+    active bookings for one slot, which would make adding them fail. Stop
+    with the list of them rather than choose here which patient keeps the
+    slot; `manage.py resolve_duplicate_bookings` reviews and cancels them.
+    """
+    Appointment = apps.get_model('hospital', 'Appointment')
+    active = Appointment.objects.using(schema_editor.connection.alias).filter(
+        status__in=ACTIVE_STATUSES
+    )
+    shared = active.values('doctor_id', 'appointment_date', 'appointment_time').annotate(
+        bookings=models.Count('id')
+    ).filter(bookings__gt=1).order_by('appointment_date', 'appointment_time')
+
+    lines = []
+    for slot in shared:
+        ids = active.filter(
+            doctor_id=slot['doctor_id'],
+            appointment_date=slot['appointment_date'],
+            appointment_time=slot['appointment_time'],
+        ).order_by('id').values_list('id', flat=True)
+        lines.append(
+            f"  doctor {slot['doctor_id'] or '(none)'} on {slot['appointment_date']} "
+            f"at {slot['appointment_time']}: appointments {', '.join(f'#{pk}' for pk in ids)}"
+        )
+    if lines:
+        raise RuntimeError(
+            'Cannot add the slot constraints: these slots have more than one active booking.\n'
+            + '\n'.join(lines)
+            + '\nRun `manage.py resolve_duplicate_bookings` to review and cancel the extra '
+            'bookings, then migrate again.'
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital', '0004_doctor_appointment_doctor_doctorschedule'),
+    ]
+
+    operations = [
+        migrations.RunPython(check_duplicate_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('status__in', ['pending', 'confirmed'])), fields=('doctor', 'appointment_date', 'appointment_time'), name='unique_active_doctor_slot'),
+        ),
+        migrations.AddConstraint(
+            model_name='appointment',
+            constraint=models.UniqueConstraint(condition=models.Q(('doctor__isnull', True), ('status__in', ['pending', 'confirmed'])), fields=('appointment_date', 'appointment_time'), name='unique_active_open_slot'),
+        ),
+    ]
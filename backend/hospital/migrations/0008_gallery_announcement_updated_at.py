@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:10
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital', '0007_dashboardcounter'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='announcement',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='gallery',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,90 @@
+# Generated by Django 4.2.7 on 2026-10-18 00:20
+
+import django.contrib.postgres.search
+from django.db import migrations
+
+CONFIG = 'english'
+
+# table -> (column, weight) pairs; mirrors hospital.search.SEARCH_DOCUMENTS
+DOCUMENTS = {
+    'hospital_doctor': [
+        ('first_name', 'A'), ('last_name', 'A'), ('specialization', 'B'), ('qualifications', 'C'),
+    ],
+    'hospital_news': [('title', 'A'), ('excerpt', 'B'), ('content', 'C')],
+    'hospital_appointment': [('patient_name', 'A'), ('patient_email', 'A'), ('reason', 'C')],
+    'hospital_contactinquiry': [
+        ('name', 'A'), ('email', 'A'), ('subject', 'B'), ('message', 'C'),
+    ],
+}
+
+
+def vector_sql(columns, prefix=''):
+    return ' || '.join(
+        f"setweight(to_tsvector('{CONFIG}', coalesce({prefix}{column}, '')), '{weight}')"
+        for column, weight in columns
+    )
+
+
+def create_search_triggers(apps, schema_editor):
+    # Triggers and GIN indexes are PostgreSQL-only; elsewhere search falls back to icontains
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table, columns in DOCUMENTS.items():
+        names = ', '.join(column for column, _ in columns)
+        schema_editor.execute(f"""
+            CREATE OR REPLACE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+            BEGIN
+                NEW.search_vector := {vector_sql(columns, 'NEW.')};
+                RETURN NEW;
+            END
+            $$ LANGUAGE plpgsql
+        """)
+        schema_editor.execute(f"""
+            CREATE TRIGGER {table}_search_vector_update
+            BEFORE INSERT OR UPDATE OF {names} ON {table}
+            FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()
+        """)
+        schema_editor.execute(f'UPDATE {table} SET search_vector = {vector_sql(columns)}')
+        schema_editor.execute(
+            f'CREATE INDEX {table}_search_idx ON {table} USING gin (search_vector)'
+        )
+
+
+def drop_search_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    for table in DOCUMENTS:
+        schema_editor.execute(f'DROP INDEX IF EXISTS {table}_search_idx')
+        schema_editor.execute(f'DROP TRIGGER IF EXISTS {table}_search_vector_update ON {table}')
+        schema_editor.execute(f'DROP FUNCTION IF EXISTS {table}_search_vector()')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital', '0008_gallery_announcement_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='contactinquiry',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='doctor',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True),
+        ),
+        migrations.RunPython(create_search_triggers, drop_search_triggers),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital', '0010_outboxevent'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='day_reminder_sent_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='hour_reminder_sent_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(condition=models.Q(('status', 'confirmed')), fields=['appointment_date', 'appointment_time'], name='appt_confirmed_start_idx'),
+        ),
+    ]
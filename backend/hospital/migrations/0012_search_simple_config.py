@@ -0,0 +1,63 @@
+from django.db import migrations
+
+# table -> (column, weight, config); mirrors hospital.search.SEARCH_DOCUMENTS.
+# Names and emails move from 'english' to 'simple' so they are neither
+# stemmed nor dropped as stop words.
+DOCUMENTS = {
+    'hospital_doctor': [
+        ('first_name', 'A', 'simple'), ('last_name', 'A', 'simple'),
+        ('specialization', 'B', 'english'), ('qualifications', 'C', 'english'),
+    ],
+    'hospital_news': [('title', 'A', 'english'), ('excerpt', 'B', 'english'), ('content', 'C', 'english')],
+    'hospital_appointment': [
+        ('patient_name', 'A', 'simple'), ('patient_email', 'A', 'simple'), ('reason', 'C', 'english'),
+    ],
+    'hospital_contactinquiry': [
+        ('name', 'A', 'simple'), ('email', 'A', 'simple'),
+        ('subject', 'B', 'english'), ('message', 'C', 'english'),
+    ],
+}
+
+
+def vector_sql(columns, prefix=''):
+    return ' || '.join(
+        f"setweight(to_tsvector('{config}', coalesce({prefix}{column}, '')), '{weight}')"
+        for column, weight, config in columns
+    )
+
+
+def rebuild_search_vectors(documents):
+    """Replace the trigger functions of migration 0009 and recompute every vector"""
+    def rebuild(apps, schema_editor):
+        if schema_editor.connection.vendor != 'postgresql':
+            return
+        for table, columns in documents.items():
+            schema_editor.execute(f"""
+                CREATE OR REPLACE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+                BEGIN
+                    NEW.search_vector := {vector_sql(columns, 'NEW.')};
+                    RETURN NEW;
+                END
+                $$ LANGUAGE plpgsql
+            """)
+            schema_editor.execute(f'UPDATE {table} SET search_vector = {vector_sql(columns)}')
+    return rebuild
+
+
+ENGLISH_DOCUMENTS = {
+    table: [(column, weight, 'english') for column, weight, _ in columns]
+    for table, columns in DOCUMENTS.items()
+}
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital', '0011_appointment_reminders'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            rebuild_search_vectors(DOCUMENTS), rebuild_search_vectors(ENGLISH_DOCUMENTS)
+        ),
+    ]
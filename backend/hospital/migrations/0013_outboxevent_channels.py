@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2026-10-17 22:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hospital', '0012_search_simple_config'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='outboxevent',
+            name='email_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='outboxevent',
+            name='sms_sent_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
@@ -1,3 +1,6 @@
+import uuid
+
+from django.contrib.postgres.search import SearchVectorField
 from django.db import models
 from django.core.validators import RegexValidator
 from django.utils import timezone
@@ -68,6 +71,8 @@ class Doctor(models.Model):
     
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL (see search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return f"Dr. {self.first_name} {self.last_name} - {self.specialization}"
@@ -100,6 +105,10 @@ class DoctorSchedule(models.Model):
         unique_together = ['doctor', 'day_of_week']
 
 
+# Appointment statuses that hold a doctor's time slot
+ACTIVE_APPOINTMENT_STATUSES = ['pending', 'confirmed']
+
+
 class Appointment(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -108,6 +117,8 @@ class Appointment(models.Model):
         ('cancelled', 'Cancelled'),
         ('no_show', 'No Show'),
     ]
+
+    ACTIVE_STATUSES = ACTIVE_APPOINTMENT_STATUSES
     
     GENDER_CHOICES = [
         ('M', 'Male'),
@@ -135,14 +146,48 @@ class Appointment(models.Model):
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
     is_emergency = models.BooleanField(default=False)
     
+    # Set by hospital/reminders.py; cleared when the appointment is rescheduled
+    day_reminder_sent_at = models.DateTimeField(null=True, blank=True, editable=False)
+    hour_reminder_sent_at = models.DateTimeField(null=True, blank=True, editable=False)
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL (see search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return f"{self.patient_name} - {self.appointment_date}"
 
     class Meta:
         ordering = ['-appointment_date', '-appointment_time']
+        # The partial unique constraints below double as the index for
+        # per-doctor slot lookups (doctor, date, time WHERE status is active)
+        indexes = [
+            # Default ordering and date filters (today's appointments, list filters)
+            models.Index(fields=['-appointment_date', '-appointment_time'], name='appt_date_time_idx'),
+            # Status counts and status + date filters (dashboard, pending lists)
+            models.Index(fields=['status', 'appointment_date'], name='appt_status_date_idx'),
+            # Reminder scans: confirmed appointments in an upcoming (date, time) range
+            models.Index(
+                fields=['appointment_date', 'appointment_time'],
+                condition=models.Q(status='confirmed'),
+                name='appt_confirmed_start_idx',
+            ),
+        ]
+        constraints = [
+            # One active booking per doctor slot; cancelled/completed rows don't count
+            models.UniqueConstraint(
+                fields=['doctor', 'appointment_date', 'appointment_time'],
+                condition=models.Q(status__in=ACTIVE_APPOINTMENT_STATUSES),
+                name='unique_active_doctor_slot',
+            ),
+            # Bookings without a doctor share one slot pool per date and time
+            models.UniqueConstraint(
+                fields=['appointment_date', 'appointment_time'],
+                condition=models.Q(doctor__isnull=True, status__in=ACTIVE_APPOINTMENT_STATUSES),
+                name='unique_active_open_slot',
+            ),
+        ]
 
 class News(models.Model):
     title = models.CharField(max_length=200)
@@ -156,6 +201,8 @@ class News(models.Model):
     published_date = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL (see search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return self.title
@@ -191,6 +238,8 @@ class ContactInquiry(models.Model):
     response = models.TextField(blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
+    # Maintained by a database trigger on PostgreSQL (see search.py)
+    search_vector = SearchVectorField(null=True, editable=False)
 
     def __str__(self):
         return f"{self.name} - {self.subject}"
@@ -259,6 +308,7 @@ class Gallery(models.Model):
     is_featured = models.BooleanField(default=False)
     display_order = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
@@ -275,9 +325,60 @@ class Announcement(models.Model):
     start_date = models.DateTimeField()
     end_date = models.DateTimeField(blank=True, null=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def __str__(self):
         return self.title
 
     class Meta:
         ordering = ['-is_urgent', '-start_date']
+
+class DashboardCounter(models.Model):
+    """Materialized count maintained by model signals (see hospital/counters.py)"""
+    name = models.CharField(max_length=100, unique=True)
+    value = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} = {self.value}"
+
+    class Meta:
+        ordering = ['name']
+
+
+class OutboxEvent(models.Model):
+    """
+    A side effect (notification) recorded in the same transaction as the
+    change that caused it and delivered afterwards (see hospital/outbox.py)
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('done', 'Done'),
+        ('failed', 'Failed'),
+    ]
+
+    event_type = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    # Sent with every delivery so receivers can drop duplicates of a retried event
+    idempotency_key = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    # Earliest time the next delivery attempt may run (pushed back after failures)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    # Channels already delivered; a retry after a partial failure skips them
+    email_sent_at = models.DateTimeField(null=True, blank=True)
+    sms_sent_at = models.DateTimeField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.event_type} #{self.pk} ({self.status})"
+
+    class Meta:
+        ordering = ['created_at']
+        indexes = [
+            # Claiming due events: status = 'pending' AND available_at <= now
+            models.Index(fields=['status', 'available_at'], name='outbox_status_available_idx'),
+        ]
+
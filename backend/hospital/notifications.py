@@ -0,0 +1,206 @@
+"""
+Emails and text messages sent for outbox events.
+
+Each event type has a builder returning the emails and SMS for its
+payload. deliver() sends a whole batch over one SMTP connection and one
+Twilio client, and looks up the doctor names and hospital details the
+messages mention once per batch rather than once per event. SMS is only
+sent when TWILIO_ACCOUNT_SID is configured. Each event records when its
+emails and its SMS went out, and a channel already sent is skipped when
+the event is retried.
+"""
+import logging
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.utils import DNS_NAME
+from django.utils import timezone
+
+from .models import Doctor, HospitalInfo
+
+logger = logging.getLogger(__name__)
+
+BUILDERS = {}
+
+# Appointment statuses patients are told about, and how
+STATUS_WORDING = {
+    'confirmed': 'is confirmed',
+    'cancelled': 'has been cancelled',
+}
+
+
+def builder(event_type):
+    """Register the message builder for an event type"""
+    def register(func):
+        BUILDERS[event_type] = func
+        return func
+    return register
+
+
+class BatchContext:
+    """Lookups shared by the messages of one batch"""
+
+    def __init__(self, events):
+        doctor_ids = {event.payload.get('doctor_id') for event in events} - {None}
+        self.doctors = {
+            pk: f'Dr. {first_name} {last_name}'
+            for pk, first_name, last_name in Doctor.objects.filter(
+                pk__in=doctor_ids
+            ).values_list('id', 'first_name', 'last_name')
+        } if doctor_ids else {}
+        info = HospitalInfo.objects.only('name', 'email_primary').first()
+        self.hospital_name = info.name if info else 'The hospital'
+        self.staff_email = info.email_primary if info else None
+
+    def email(self, to, subject, body):
+        # Header values must be single lines
+        subject = ' '.join(subject.split())
+        return EmailMessage(subject, body, settings.DEFAULT_FROM_EMAIL, [to])
+
+
+def describe_appointment(payload, context):
+    when = f"{payload['appointment_date']} at {payload['appointment_time']}"
+    doctor = context.doctors.get(payload.get('doctor_id'))
+    return f'{when} with {doctor}' if doctor else when
+
+
+@builder('appointment.created')
+def appointment_created(payload, context):
+    appointment = describe_appointment(payload, context)
+    email = context.email(
+        payload['patient_email'],
+        f"Appointment request received - {payload['appointment_date']}",
+        f"Dear {payload['patient_name']},\n\n"
+        f"We have received your appointment request for {appointment}. "
+        f"We will let you know as soon as it is confirmed.\n\n"
+        f"{context.hospital_name}",
+    )
+    sms = f'{context.hospital_name}: we received your appointment request for {appointment}.'
+    return [email], [(payload['patient_phone'], sms)]
+
+
+@builder('appointment.status_changed')
+def appointment_status_changed(payload, context):
+    wording = STATUS_WORDING.get(payload['status'])
+    if wording is None:
+        return [], []
+    appointment = describe_appointment(payload, context)
+    email = context.email(
+        payload['patient_email'],
+        f"Your appointment {wording} - {payload['appointment_date']}",
+        f"Dear {payload['patient_name']},\n\n"
+        f"Your appointment on {appointment} {wording}.\n\n"
+        f"{context.hospital_name}",
+    )
+    sms = f'{context.hospital_name}: your appointment on {appointment} {wording}.'
+    return [email], [(payload['patient_phone'], sms)]
+
+
+@builder('appointment.reminder')
+def appointment_reminder(payload, context):
+    appointment = describe_appointment(payload, context)
+    if payload['reminder'] == 'hour':
+        reminder = f'Your appointment on {appointment} starts within the hour.'
+    else:
+        reminder = f'This is a reminder of your appointment on {appointment}.'
+    email = context.email(
+        payload['patient_email'],
+        f"Appointment reminder - {payload['appointment_date']} {payload['appointment_time']}",
+        f"Dear {payload['patient_name']},\n\n"
+        f"{reminder}\n\n"
+        f"{context.hospital_name}",
+    )
+    return [email], [(payload['patient_phone'], f'{context.hospital_name}: {reminder}')]
+
+
+@builder('inquiry.created')
+def inquiry_created(payload, context):
+    emails = [context.email(
+        payload['email'],
+        f"We received your message: {payload['subject']}",
+        f"Dear {payload['name']},\n\n"
+        f"Thank you for contacting us. We will reply to your message as soon as possible.\n\n"
+        f"{context.hospital_name}",
+    )]
+    if context.staff_email:
+        emails.append(context.email(
+            context.staff_email,
+            f"New {payload['inquiry_type']} inquiry: {payload['subject']}",
+            f"From: {payload['name']} <{payload['email']}> {payload['phone']}\n"
+            f"Inquiry #{payload['inquiry_id']}",
+        ))
+    return emails, []
+
+
+def get_sms_client():
+    if not settings.TWILIO_ACCOUNT_SID:
+        return None
+    from twilio.http.http_client import TwilioHttpClient
+    from twilio.rest import Client
+    return Client(
+        settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN,
+        http_client=TwilioHttpClient(timeout=settings.TWILIO_TIMEOUT),
+    )
+
+
+def deliver(events, context=None):
+    """
+    Send the messages for a batch of events; returns {event pk: error} for
+    failures. Sets email_sent_at and sms_sent_at on the events as each
+    channel completes; the caller saves them.
+    """
+    context = context or BatchContext(events)
+    sms_client = get_sms_client()
+    connection = get_connection()
+    smtp_error = None
+    try:
+        connection.open()
+    except Exception as exc:
+        smtp_error = f'Could not connect to the mail server: {exc}'
+        logger.warning(smtp_error)
+
+    errors = {}
+    try:
+        for event in events:
+            build = BUILDERS.get(event.event_type)
+            if build is None:
+                errors[event.pk] = f'Unknown event type {event.event_type}'
+                continue
+            try:
+                emails, texts = build(event.payload, context)
+            except Exception as exc:
+                errors[event.pk] = f'{type(exc).__name__}: {exc}'
+                continue
+
+            # Each channel is tried even if the other failed
+            failures = []
+            if emails and event.email_sent_at is None:
+                try:
+                    send_emails(connection, smtp_error, event, emails)
+                    event.email_sent_at = timezone.now()
+                except Exception as exc:
+                    failures.append(f'{type(exc).__name__}: {exc}')
+            texts = [(to, body) for to, body in texts if to]
+            if sms_client and texts and event.sms_sent_at is None:
+                try:
+                    for to, body in texts:
+                        sms_client.messages.create(to=to, from_=settings.TWILIO_FROM_NUMBER, body=body)
+                    event.sms_sent_at = timezone.now()
+                except Exception as exc:
+                    failures.append(f'{type(exc).__name__}: {exc}')
+            if failures:
+                errors[event.pk] = '; '.join(failures)
+                logger.warning(f"Delivery failed for outbox event {event.pk}: {errors[event.pk]}")
+    finally:
+        connection.close()
+    return errors
+
+
+def send_emails(connection, smtp_error, event, emails):
+    if smtp_error:
+        raise ConnectionError(smtp_error)
+    for index, email in enumerate(emails):
+        # Stable across retries, so a re-sent copy can be recognised
+        email.extra_headers['Message-ID'] = f'<{event.idempotency_key}.{index}@{DNS_NAME}>'
+        email.extra_headers['X-Idempotency-Key'] = str(event.idempotency_key)
+    connection.send_messages(emails)
@@ -0,0 +1,243 @@
+"""
+Transactional outbox for notifications.
+
+Signal handlers record an OutboxEvent inside the transaction that saves an
+appointment or inquiry, so an event exists exactly when the change
+committed. Once the transaction commits, schedule_dispatch() queues the
+dispatch_outbox Celery task, at most once per OUTBOX_DISPATCH_DELAY, so a
+burst of bookings is delivered as one batch and no request waits on SMTP
+or SMS. The beat schedule runs the same task every minute to pick up
+retries and events whose task never reached the broker. Without a broker
+(CELERY_TASK_ALWAYS_EAGER) nothing is queued, since the task would run
+inside the request; run_outbox_relay delivers the events instead.
+
+dispatch() claims due events in a short transaction: SELECT ... FOR
+UPDATE SKIP LOCKED, so concurrent workers take disjoint batches, then
+pushes their available_at OUTBOX_CLAIM_TIMEOUT ahead as a lease. No lock
+is held while the batch is delivered (see notifications.py); the results
+are written afterwards, and the events of a worker that died mid-batch
+become due again when the lease runs out. A failed event is retried with
+exponential backoff until OUTBOX_MAX_ATTEMPTS. Email and SMS completion
+are recorded separately, so a retry only sends the channel that failed.
+Each event's idempotency_key goes out with its messages, so a receiver can
+still drop a copy sent again after a worker died.
+
+Events can also be relayed by `manage.py run_outbox_relay`, a long-running
+worker polling dispatch(); it and the Celery task can run side by side.
+Within a batch, messages are sent from OUTBOX_CONCURRENCY threads, each
+with its own SMTP connection. Every batch adds to per-minute cache
+counters (delivered events, failed attempts, total delivery lag) that
+metrics() reports together with the backlog.
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, F, Min
+from django.utils import timezone
+
+from . import notifications
+from .cache import cache_key, get_cache, increment
+from .models import OutboxEvent
+
+logger = logging.getLogger(__name__)
+
+APPOINTMENT_CREATED = 'appointment.created'
+APPOINTMENT_STATUS_CHANGED = 'appointment.status_changed'
+INQUIRY_CREATED = 'inquiry.created'
+APPOINTMENT_REMINDER = 'appointment.reminder'
+
+# Longest wait between two attempts at the same event
+MAX_RETRY_DELAY = 60 * 60
+
+DISPATCH_SCHEDULED_KEY = cache_key('outbox', 'dispatch_scheduled')
+
+# Metrics are counted per minute and kept for an hour
+METRICS_WINDOW = 60
+METRICS_RETENTION = 60 * 60
+METRICS = ('delivered', 'failed_attempts', 'lag_ms')
+
+
+def emit(event_type, payload):
+    """Record an event in the current transaction; it is dispatched after commit"""
+    event = OutboxEvent.objects.create(event_type=event_type, payload=payload)
+    transaction.on_commit(schedule_dispatch)
+    return event
+
+
+def emit_many(event_type, payloads):
+    """Record one event per payload with a single INSERT"""
+    events = OutboxEvent.objects.bulk_create(
+        [OutboxEvent(event_type=event_type, payload=payload) for payload in payloads]
+    )
+    transaction.on_commit(schedule_dispatch)
+    return events
+
+
+def appointment_payload(appointment):
+    return {
+        'appointment_id': appointment.pk,
+        'patient_name': appointment.patient_name,
+        'patient_email': appointment.patient_email,
+        'patient_phone': appointment.patient_phone,
+        'doctor_id': appointment.doctor_id,
+        'appointment_date': str(appointment.appointment_date),
+        'appointment_time': str(appointment.appointment_time)[:5],
+        'status': appointment.status,
+    }
+
+
+def appointment_created(appointment):
+    return emit(APPOINTMENT_CREATED, appointment_payload(appointment))
+
+
+def appointment_status_changed(appointment, previous_status):
+    payload = appointment_payload(appointment)
+    payload['previous_status'] = previous_status
+    return emit(APPOINTMENT_STATUS_CHANGED, payload)
+
+
+def inquiry_created(inquiry):
+    return emit(INQUIRY_CREATED, {
+        'inquiry_id': inquiry.pk,
+        'name': inquiry.name,
+        'email': inquiry.email,
+        'phone': inquiry.phone,
+        'inquiry_type': inquiry.inquiry_type,
+        'subject': inquiry.subject,
+    })
+
+
+def schedule_dispatch():
+    """Queue a dispatch task, unless one is already waiting to run"""
+    from .tasks import dispatch_outbox
+
+    if dispatch_outbox.app.conf.task_always_eager:
+        # The task would deliver inside the request; leave it to the relay
+        return
+    delay = settings.OUTBOX_DISPATCH_DELAY
+    if not get_cache().add(DISPATCH_SCHEDULED_KEY, True, delay):
+        return
+    try:
+        dispatch_outbox.apply_async(countdown=delay)
+    except Exception:
+        # Never fail the write that emitted the event; the periodic run delivers it
+        logger.exception('Could not queue outbox dispatch')
+
+
+def retry_delay(attempts):
+    return min(settings.OUTBOX_RETRY_DELAY * 2 ** (attempts - 1), MAX_RETRY_DELAY)
+
+
+def claim_batch(limit, now):
+    """Lease up to limit due events to this worker, skipping those other workers are claiming"""
+    with transaction.atomic():
+        events = list(
+            OutboxEvent.objects.select_for_update(skip_locked=True)
+            .filter(status='pending', available_at__lte=now)
+            .order_by('available_at', 'id')[:limit]
+        )
+        if events:
+            # Counted now, so an event that kills its worker still runs out of attempts
+            OutboxEvent.objects.filter(pk__in=[event.pk for event in events]).update(
+                available_at=now + timedelta(seconds=settings.OUTBOX_CLAIM_TIMEOUT),
+                attempts=F('attempts') + 1,
+            )
+    for event in events:
+        event.attempts += 1
+    return events
+
+
+def deliver(events, concurrency):
+    """Send a batch from up to concurrency threads; returns {event pk: error}"""
+    # Lookups happen here: the sending threads never touch the database
+    context = notifications.BatchContext(events)
+    chunks = [events[start::concurrency] for start in range(min(concurrency, len(events)))]
+    if len(chunks) == 1:
+        return notifications.deliver(events, context)
+    errors = {}
+    with ThreadPoolExecutor(max_workers=len(chunks)) as pool:
+        for chunk_errors in pool.map(lambda chunk: notifications.deliver(chunk, context), chunks):
+            errors.update(chunk_errors)
+    return errors
+
+
+def dispatch(batch_size=None, concurrency=None):
+    """Deliver one batch of due events and return how many were processed"""
+    events = claim_batch(batch_size or settings.OUTBOX_BATCH_SIZE, timezone.now())
+    if not events:
+        return 0
+    errors = deliver(events, concurrency or settings.OUTBOX_CONCURRENCY)
+
+    now = timezone.now()
+    for event in events:
+        error = errors.get(event.pk)
+        if error is None:
+            event.status = 'done'
+            event.processed_at = now
+            event.last_error = ''
+            continue
+        event.last_error = error
+        if event.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+            event.status = 'failed'
+            event.processed_at = now
+            logger.error(f"Outbox event {event.pk} failed after {event.attempts} attempts: {error}")
+        else:
+            event.available_at = now + timedelta(seconds=retry_delay(event.attempts))
+    OutboxEvent.objects.bulk_update(events, [
+        'status', 'available_at', 'last_error', 'processed_at', 'email_sent_at', 'sms_sent_at',
+    ])
+    record_metrics(events, now)
+    return len(events)
+
+
+def metrics_key(name, window):
+    return cache_key('outbox_metrics', name, window)
+
+
+def record_metrics(events, now):
+    window = int(now.timestamp() // METRICS_WINDOW)
+    delivered = [event for event in events if event.status == 'done']
+    values = {
+        'delivered': len(delivered),
+        'failed_attempts': len(events) - len(delivered),
+        'lag_ms': int(sum((now - event.created_at).total_seconds() for event in delivered) * 1000),
+    }
+    for name, value in values.items():
+        if value:
+            increment(metrics_key(name, window), METRICS_RETENTION, value)
+
+
+def metrics(minutes=5):
+    """Backlog and throughput of the last few minutes"""
+    now = timezone.now()
+    current = int(now.timestamp() // METRICS_WINDOW)
+    windows = range(current - minutes + 1, current + 1)
+    values = get_cache().get_many([metrics_key(name, window) for name in METRICS for window in windows])
+    totals = {
+        name: sum(values.get(metrics_key(name, window), 0) for window in windows) for name in METRICS
+    }
+
+    counts = dict(
+        OutboxEvent.objects.filter(status__in=['pending', 'failed'])
+        .values_list('status').annotate(Count('id')).order_by()
+    )
+    oldest_due = OutboxEvent.objects.filter(
+        status='pending', available_at__lte=now
+    ).aggregate(oldest=Min('created_at'))['oldest']
+    seconds = minutes * METRICS_WINDOW
+    delivered = totals['delivered']
+    return {
+        'pending': counts.get('pending', 0),
+        'failed': counts.get('failed', 0),
+        # Age of the oldest event waiting for delivery: how far the relay is behind
+        'lag_seconds': round((now - oldest_due).total_seconds(), 1) if oldest_due else 0,
+        'window_seconds': seconds,
+        'delivered': delivered,
+        'delivered_per_second': round(delivered / seconds, 2),
+        'failed_attempts': totals['failed_attempts'],
+        # Mean time from an event's commit to its delivery
+        'average_delivery_seconds': round(totals['lag_ms'] / 1000 / delivered, 3) if delivered else None,
+    }
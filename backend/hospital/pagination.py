@@ -0,0 +1,113 @@
+"""
+Keyset (cursor) pagination for long admin lists.
+
+Page-number pagination runs COUNT(*) and an OFFSET scan per page, both of
+which grow with the table. KeysetPagination keeps page numbers as the
+default for compatibility, and switches to keyset paging when a request
+passes ?pagination=cursor or a ?cursor= from a previous response:
+
+    {"next": "...?cursor=WyIyMDI0LTA1LTAxIiwgIjA5OjMwOjAwIiwgNDJd", "results": [...]}
+
+The cursor encodes the last row's values of the ordering fields, and the
+next page is the rows strictly after it in that ordering, so each page is
+one indexed range query however deep it is, and rows inserted meanwhile
+never shift or repeat entries. Datetimes are encoded in full ISO format:
+DjangoJSONEncoder cuts them to milliseconds, which would skip the rest of
+the rows sharing the last row's millisecond. In cursor mode the list's fixed ordering
+replaces any ?ordering= parameter.
+"""
+import base64
+import json
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+class KeysetPagination(PageNumberPagination):
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    # Unique overall, e.g. ('-appointment_date', '-appointment_time', 'id')
+    ordering = ()
+    invalid_cursor_message = 'Invalid cursor'
+
+    def use_cursor(self, request):
+        return (
+            self.cursor_query_param in request.query_params
+            or request.query_params.get(self.mode_query_param) == 'cursor'
+        )
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.cursor_mode = self.use_cursor(request)
+        if not self.cursor_mode:
+            return super().paginate_queryset(queryset, request, view)
+
+        self.request = request
+        page_size = self.get_page_size(request)
+        queryset = queryset.order_by(*self.ordering)
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded:
+            queryset = queryset.filter(self.after(self.decode_cursor(queryset.model, encoded)))
+
+        # One extra row tells whether there is a next page, without a COUNT
+        rows = list(queryset[:page_size + 1])
+        self.page_rows = rows[:page_size]
+        self.has_next = len(rows) > page_size
+        return self.page_rows
+
+    def get_paginated_response(self, data):
+        if not self.cursor_mode:
+            return super().get_paginated_response(data)
+        return Response({'next': self.get_next_cursor_link(), 'results': data})
+
+    def get_next_cursor_link(self):
+        if not self.has_next:
+            return None
+        last = self.page_rows[-1]
+        values = [getattr(last, field.lstrip('-')) for field in self.ordering]
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(url, self.cursor_query_param, self.encode_cursor(values))
+
+    def encode_cursor(self, values):
+        payload = json.dumps([
+            value.isoformat() if hasattr(value, 'isoformat') else value for value in values
+        ])
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, model, encoded):
+        try:
+            values = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if len(values) != len(self.ordering):
+                raise ValueError
+            return [
+                model._meta.get_field(field.lstrip('-')).to_python(value)
+                for field, value in zip(self.ordering, values)
+            ]
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def after(self, values):
+        """Rows strictly after values in self.ordering (lexicographic comparison)"""
+        condition = Q()
+        for i, field in enumerate(self.ordering):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            step = Q(**{f'{name}__{lookup}': values[i]})
+            for previous, value in zip(self.ordering[:i], values[:i]):
+                step &= Q(**{previous.lstrip('-'): value})
+            condition |= step
+
+        # Redundant bound on the leading field lets the planner use its index
+        first = self.ordering[0]
+        bound = 'lte' if first.startswith('-') else 'gte'
+        return Q(**{f'{first.lstrip("-")}__{bound}': values[0]}) & condition
+
+
+class AppointmentPagination(KeysetPagination):
+    ordering = ('-appointment_date', '-appointment_time', 'id')
+
+
+class ContactInquiryPagination(KeysetPagination):
+    ordering = ('-created_at', 'id')
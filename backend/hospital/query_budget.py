@@ -0,0 +1,117 @@
+"""
+Query budgets for API endpoints.
+
+A view declares how many SQL queries one GET request may run:
+
+    class DoctorListView(generics.ListCreateAPIView):
+        query_budget = 2
+
+check_query_budgets() finds every budgeted view in hospital.urls, seeds a
+few rows per model (enough for per-row queries to show up), calls each
+view and compares the number of executed queries with its budget. It
+writes rows and rebuilds the counters table, so it only runs from the test
+suite (QueryBudgetTests in tests.py), against the test database.
+"""
+from datetime import date, time, timedelta
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import URLPattern, reverse
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from .counters import reconcile_counters
+from .models import Appointment, Department, Doctor, Service
+
+SAMPLE_ROWS = 3
+
+
+def seed_sample_rows(rows=SAMPLE_ROWS):
+    """Create a few related rows so per-row queries show up in the counts"""
+    for i in range(rows):
+        department = Department.objects.create(
+            name=f'Query Budget Department {i}', description='Query budget sample'
+        )
+        doctor = Doctor.objects.create(
+            first_name='Query', last_name=f'Budget {i}',
+            email=f'query-budget-{i}@example.com', phone='+919000000000',
+            gender='O', date_of_birth=date(1980, 1, 1),
+            medical_license=f'QUERY-BUDGET-{i}', specialization='General',
+            department=department, years_of_experience=1,
+            qualifications='MBBS', bio='Query budget sample', consultation_fee=0,
+        )
+        Service.objects.create(
+            name=f'Query Budget Service {i}', description='Query budget sample',
+            department=department,
+        )
+        Appointment.objects.create(
+            patient_name=f'Query Budget Patient {i}', patient_email='patient@example.com',
+            patient_phone='+919000000000', patient_age=30, patient_gender='O',
+            doctor=doctor, appointment_date=date.today() + timedelta(days=1),
+            appointment_time=time(9 + i), reason='Query budget sample',
+        )
+    # Counters are measured warm, as they are in steady state
+    reconcile_counters()
+
+
+def budgeted_patterns():
+    """Yield (url name, view class, URL kwarg names) for views that declare a query_budget"""
+    from . import urls
+
+    for pattern in urls.urlpatterns:
+        if not isinstance(pattern, URLPattern):
+            continue
+        view_class = getattr(pattern.callback, 'view_class', None)
+        if view_class is None or getattr(view_class, 'query_budget', None) is None:
+            continue
+        yield pattern.name, view_class, list(pattern.pattern.converters)
+
+
+def _measure(pattern_name, view_class, kwarg_names, factory, user):
+    kwargs = {}
+    if 'pk' in kwarg_names:
+        instance = view_class.queryset.model._default_manager.order_by('pk').first()
+        kwargs['pk'] = instance.pk
+    path = reverse(pattern_name, kwargs=kwargs)
+
+    api_key = getattr(settings, 'API_KEYS', ['hospital-api-key-2024'])[0]
+    request = factory.get(path, HTTP_X_API_KEY=api_key)
+    force_authenticate(request, user=user)
+
+    view = view_class.as_view()
+    with CaptureQueriesContext(connection) as context:
+        response = view(request, **kwargs)
+        response.render()
+    return {
+        'name': pattern_name,
+        'path': path,
+        'status': response.status_code,
+        'queries': len(context.captured_queries),
+        'budget': view_class.query_budget,
+        'sql': [query['sql'] for query in context.captured_queries],
+    }
+
+
+def check_query_budgets(seed=True):
+    """
+    Request every budgeted endpoint and return one result dict per endpoint
+    with its status code, executed query count, budget and SQL. Call it from
+    a test: the seeded rows are only removed by the test's rollback.
+    """
+    factory = APIRequestFactory()
+    # Unsaved staff user: permission checks pass without extra auth queries
+    user = User(username='query-budget', is_staff=True, is_superuser=True)
+    # Budgets cover the full pipeline, not a response cache hit
+    with override_settings(RESPONSE_CACHE_ENABLED=False):
+        if seed:
+            seed_sample_rows()
+        return [
+            _measure(name, view_class, kwarg_names, factory, user)
+            for name, view_class, kwarg_names in budgeted_patterns()
+        ]
+
+
+def over_budget(results):
+    """Results that failed or ran more queries than their budget"""
+    return [r for r in results if r['status'] != 200 or r['queries'] > r['budget']]
@@ -0,0 +1,109 @@
+"""
+Cache-backed rate limiting.
+
+Each client gets one counter per scope and time window, bumped with a
+single atomic increment. The request rate is estimated as a sliding window
+by weighting the previous window's counter by how much of it still overlaps
+the last `duration` seconds. Every check is O(1) regardless of how many
+requests a client has made, and nothing is read-modified-written.
+Only admitted requests count: a rejected request takes its increment back,
+so a client retrying while throttled is let in again once its rate drops.
+
+Rates are configured per scope in settings.RATE_LIMITS, e.g.
+    RATE_LIMITS = {'appointment_create': '5/min'}
+"""
+import time
+
+from django.conf import settings
+from rest_framework.throttling import BaseThrottle
+
+from .cache import cache_key, get_cache, increment
+
+PERIODS = {'s': 1, 'm': 60, 'h': 60 * 60, 'd': 60 * 60 * 24}
+
+
+def parse_rate(rate):
+    """Parse '5/min' style rates into (num_requests, duration_in_seconds)"""
+    num, period = rate.split('/')
+    return int(num), PERIODS[period[0]]
+
+
+class RateLimiter:
+    """Sliding-window request counter for one scope"""
+
+    def __init__(self, scope, rate=None):
+        self.scope = scope
+        if rate is None:
+            rate = settings.RATE_LIMITS[scope]
+        if isinstance(rate, str):
+            rate = parse_rate(rate)
+        self.num_requests, self.duration = rate
+
+    def allow(self, ident):
+        """Record a request from ident, or return False if it is over the limit"""
+        now = time.time()
+        window = int(now // self.duration)
+        key = self.key(ident, window)
+        # Count first so concurrent requests can't all pass a read-only check.
+        # Keep each counter for two windows so the next window can weight it.
+        current = increment(key, self.duration * 2)
+        previous = get_cache().get(self.key(ident, window - 1), 0)
+        overlap = 1 - (now % self.duration) / self.duration
+        if previous * overlap + current <= self.num_requests:
+            return True
+        increment(key, self.duration * 2, -1)
+        return False
+
+    def retry_after(self):
+        """Seconds until the current window rolls over"""
+        return int(self.duration - time.time() % self.duration) + 1
+
+    def key(self, ident, window):
+        return cache_key('rate_limit', self.scope, ident, window)
+
+
+class ScopedRateLimitThrottle(BaseThrottle):
+    """
+    DRF throttle backed by RateLimiter. The scope comes from the view's
+    `rate_limit_scope` attribute, or from `scope` on subclasses.
+    """
+    scope = None
+
+    def get_scope(self, view):
+        return getattr(view, 'rate_limit_scope', None) or self.scope
+
+    def get_ident(self, request):
+        from .decorators import get_client_ip
+        return get_client_ip(request)
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(view)
+        if scope is None:
+            return True
+        self.limiter = RateLimiter(scope)
+        return self.limiter.allow(self.get_ident(request))
+
+    def wait(self):
+        return self.limiter.retry_after()
+
+
+class AnonRateLimitThrottle(ScopedRateLimitThrottle):
+    """Limit anonymous clients by IP using the 'anon' rate"""
+    scope = 'anon'
+
+    def allow_request(self, request, view):
+        if request.user and request.user.is_authenticated:
+            return True
+        self.limiter = RateLimiter(self.scope)
+        return self.limiter.allow(self.get_ident(request))
+
+
+class UserRateLimitThrottle(ScopedRateLimitThrottle):
+    """Limit authenticated users by user id using the 'user' rate"""
+    scope = 'user'
+
+    def allow_request(self, request, view):
+        if not (request.user and request.user.is_authenticated):
+            return True
+        self.limiter = RateLimiter(self.scope)
+        return self.limiter.allow(f'user-{request.user.pk}')
@@ -0,0 +1,95 @@
+"""
+Day-before and hour-before reminders for confirmed appointments.
+
+send_due_reminders() runs periodically, from Celery beat or the
+send_reminders command. For each kind of reminder it scans confirmed
+appointments starting within that kind's window by (appointment_date,
+appointment_time), which the appt_confirmed_start_idx partial index
+serves, skipping those already reminded. Appointments are taken a batch
+at a time: the batch is locked (SKIP LOCKED, so overlapping runs split the
+work rather than both sending), one outbox event per appointment is
+inserted in bulk and the batch is marked sent with a single UPDATE, all in
+one transaction. Delivery is the outbox's job (see outbox.py).
+
+Appointment dates and times are local wall-clock values, so windows are
+measured from the current local time. An appointment booked less than an
+hour ahead only gets the hour reminder. Rescheduling clears both sent
+markers (see signals.py).
+"""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import outbox
+from .models import Appointment
+
+# kind -> (sent marker field, window start, window end), relative to now
+REMINDERS = {
+    'day': ('day_reminder_sent_at', timedelta(hours=1), timedelta(hours=24)),
+    'hour': ('hour_reminder_sent_at', timedelta(0), timedelta(hours=1)),
+}
+
+# Columns outbox.appointment_payload reads
+PAYLOAD_FIELDS = [
+    'id', 'patient_name', 'patient_email', 'patient_phone', 'doctor_id',
+    'appointment_date', 'appointment_time', 'status',
+]
+
+
+def starting_between(start, end):
+    """Appointments starting after start and no later than end (local datetimes)"""
+    after_start = Q(appointment_date__gt=start.date()) | Q(
+        appointment_date=start.date(), appointment_time__gt=start.time()
+    )
+    before_end = Q(appointment_date__lt=end.date()) | Q(
+        appointment_date=end.date(), appointment_time__lte=end.time()
+    )
+    # The plain date range bounds the index scan; the rest trims its ends
+    return Q(appointment_date__range=(start.date(), end.date())) & after_start & before_end
+
+
+def due(kind, now):
+    field, window_start, window_end = REMINDERS[kind]
+    return Appointment.objects.filter(
+        starting_between(now + window_start, now + window_end),
+        status='confirmed',
+        **{f'{field}__isnull': True},
+    )
+
+
+def send_batch(kind, now, batch_size):
+    """Queue reminders for up to batch_size due appointments; returns how many"""
+    field = REMINDERS[kind][0]
+    with transaction.atomic():
+        appointments = list(
+            due(kind, now).select_for_update(skip_locked=True).only(*PAYLOAD_FIELDS)
+            .order_by('appointment_date', 'appointment_time', 'id')[:batch_size]
+        )
+        if not appointments:
+            return 0
+        outbox.emit_many(outbox.APPOINTMENT_REMINDER, [
+            dict(outbox.appointment_payload(appointment), reminder=kind)
+            for appointment in appointments
+        ])
+        Appointment.objects.filter(
+            pk__in=[appointment.pk for appointment in appointments]
+        ).update(**{field: timezone.now()})
+    return len(appointments)
+
+
+def send_due_reminders(now=None, batch_size=None):
+    """Queue every reminder that is due; returns the number queued per kind"""
+    now = timezone.localtime(now)
+    batch_size = batch_size or settings.REMINDER_BATCH_SIZE
+    sent = {}
+    for kind in REMINDERS:
+        sent[kind] = 0
+        while True:
+            count = send_batch(kind, now, batch_size)
+            sent[kind] += count
+            if count < batch_size:
+                break
+    return sent
@@ -0,0 +1,62 @@
+"""
+Atomic appointment slot reservation.
+
+Double booking is prevented by the partial unique constraints on
+Appointment (one active booking per doctor slot, and per open slot for
+bookings without a doctor). Each slot is its own index entry, so concurrent
+bookings for different slots never wait on each other; two requests racing
+for the same slot resolve in the database and the loser gets a 409.
+"""
+from django.db import IntegrityError, transaction
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+from . import slots
+from .models import Appointment
+
+SLOT_CONSTRAINTS = ('unique_active_doctor_slot', 'unique_active_open_slot')
+
+
+class SlotConflict(APIException):
+    status_code = status.HTTP_409_CONFLICT
+    default_detail = 'This time slot is already booked.'
+    default_code = 'slot_conflict'
+
+
+def _constraint_columns(name):
+    """How SQLite names a unique constraint in its errors: 'table.col1, table.col2'"""
+    constraint = next(c for c in Appointment._meta.constraints if c.name == name)
+    table = Appointment._meta.db_table
+    return ', '.join(
+        f'{table}.{Appointment._meta.get_field(field).column}' for field in constraint.fields
+    )
+
+
+def is_slot_conflict(error):
+    """True if an IntegrityError was raised by one of the slot constraints"""
+    diag = getattr(error.__cause__, 'diag', None)
+    if diag is not None:
+        # PostgreSQL reports the violated constraint by name
+        return diag.constraint_name in SLOT_CONSTRAINTS
+    message = str(error)
+    return any(
+        name in message or message.endswith(_constraint_columns(name))
+        for name in SLOT_CONSTRAINTS
+    )
+
+
+def reserve_appointment(serializer):
+    """Save a validated AppointmentCreateSerializer, raising SlotConflict if the slot was taken"""
+    data = serializer.validated_data
+    try:
+        with transaction.atomic():
+            return serializer.save()
+    except IntegrityError as error:
+        if not is_slot_conflict(error):
+            raise
+        doctor = data.get('doctor')
+        if doctor:
+            # Another worker won the race; make the index reject the slot too
+            slots.invalidate_day(doctor.pk, data['appointment_date'])
+            raise SlotConflict('This doctor is not available at this time slot.')
+        raise SlotConflict()
@@ -0,0 +1,161 @@
+"""
+HTTP response cache for public read endpoints.
+
+Views mix in CachedResponseMixin and list the models their output is built
+from in cache_models:
+
+    class GalleryListView(CachedResponseMixin, generics.ListCreateAPIView):
+        cache_models = (Gallery,)
+
+A GET is cached under the view, host, path and normalized query string
+together with the current generation of each of those models (see
+invalidation.py), so entries built before a write to any of them are
+never read again and simply expire.
+
+Responses carry an ETag (hash of the body) and Last-Modified (the latest
+write to any of the models, seeded from their updated_at columns), and
+conditional requests are answered with 304 from the cached validators
+without running the serializers.
+
+Views with cache_locally = True keep their entries in process memory and
+check the shared generations at most once per LOCAL_REVALIDATE_INTERVAL,
+so every worker picks up an admin edit within that interval.
+"""
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+
+from . import invalidation
+from .cache import cache_key, get_cache
+
+RESPONSE_CACHE_TIMEOUT = getattr(settings, 'RESPONSE_CACHE_TIMEOUT', 300)
+
+# How often process-local entries re-read their models' shared generations
+LOCAL_REVALIDATE_INTERVAL = getattr(settings, 'RESPONSE_CACHE_LOCAL_REVALIDATE', 1)
+
+# Bounds the process-local entries kept per view (distinct hosts/queries)
+LOCAL_MAX_ENTRIES = 100
+
+
+def _request_digest(request):
+    query = urlencode(sorted(
+        (name, value) for name, values in request.GET.lists() for value in values
+    ))
+    return hashlib.md5(
+        f'{request.get_host()}|{request.accepted_media_type}|{request.path}|{query}'.encode()
+    ).hexdigest()
+
+
+def response_key(view, request):
+    return cache_key(
+        'response', type(view).__name__,
+        *invalidation.generations(view.cache_models), _request_digest(request)
+    )
+
+
+class LocalResponseStore:
+    """
+    Process-local entries for one view. The shared generations are re-read
+    at most every LOCAL_REVALIDATE_INTERVAL seconds, so a hit usually costs
+    no cache round trip and a write is picked up by every worker within
+    that interval.
+    """
+
+    def __init__(self, models):
+        self.models = models
+        self.generations = None
+        self.checked_at = None
+        self.entries = {}
+
+    def _revalidate(self):
+        now = time.monotonic()
+        if self.checked_at is None or now - self.checked_at >= LOCAL_REVALIDATE_INTERVAL:
+            generations = invalidation.generations(self.models)
+            if generations != self.generations:
+                self.generations = generations
+                self.entries = {}
+            self.checked_at = now
+
+    def get(self, request):
+        self._revalidate()
+        found = self.entries.get(_request_digest(request))
+        if found is None or found[0] <= time.monotonic():
+            return None
+        return found[1]
+
+    def set(self, request, entry, timeout):
+        if len(self.entries) >= LOCAL_MAX_ENTRIES:
+            self.entries = {}
+        self.entries[_request_digest(request)] = (time.monotonic() + timeout, entry)
+
+
+def _from_entry(request, entry):
+    response = HttpResponse(entry['content'], content_type=entry['content_type'])
+    response['ETag'] = entry['etag']
+    if entry['last_modified']:
+        response['Last-Modified'] = http_date(entry['last_modified'])
+    # Clients keep the body but revalidate it on every use
+    patch_cache_control(response, no_cache=True)
+    return get_conditional_response(
+        request, etag=entry['etag'], last_modified=entry['last_modified'] or None,
+        response=response,
+    )
+
+
+class CachedResponseMixin:
+    """Serve JSON GET responses from the response cache"""
+    cache_models = ()
+    # Seconds an entry may be served; defaults to RESPONSE_CACHE_TIMEOUT
+    cache_timeout = None
+    # Keep entries in process memory instead of the shared cache; for small,
+    # rarely edited payloads requested on every page
+    cache_locally = False
+    _local_store = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        invalidation.register(f'response:{cls.__name__}', *cls.cache_models)
+        cls._local_store = LocalResponseStore(cls.cache_models) if cls.cache_locally else None
+
+    def get_cache_timeout(self):
+        if self.cache_timeout is not None:
+            return self.cache_timeout
+        return RESPONSE_CACHE_TIMEOUT
+
+    def get(self, request, *args, **kwargs):
+        if (not getattr(settings, 'RESPONSE_CACHE_ENABLED', True)
+                or request.accepted_renderer.format != 'json'):
+            return super().get(request, *args, **kwargs)
+
+        # Read generations and Last-Modified before building, so neither
+        # can describe data newer than the body stored with them
+        local = self._local_store
+        if local is not None:
+            entry = local.get(request)
+        else:
+            key = response_key(self, request)
+            entry = get_cache().get(key)
+        if entry is None:
+            modified = invalidation.last_modified(self.cache_models)
+            response = super().get(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            content = request.accepted_renderer.render(
+                response.data, request.accepted_media_type, self.get_renderer_context()
+            )
+            entry = {
+                'content': content,
+                'content_type': request.accepted_media_type,
+                'etag': '"%s"' % hashlib.md5(content).hexdigest(),
+                'last_modified': modified,
+            }
+            if local is not None:
+                local.set(request, entry, self.get_cache_timeout())
+            else:
+                get_cache().set(key, entry, self.get_cache_timeout())
+        return _from_entry(request, entry)
@@ -0,0 +1,75 @@
+"""
+HTML sanitization for free-text input fields.
+
+Only fields that hold user-written text (appointment reasons and notes,
+inquiry messages, names) are cleaned, when their serializer validates them:
+ModelSerializers list them in Meta.sanitized_fields and SanitizedFieldsMixin
+turns those into SanitizedCharFields.
+
+The fields hold plain text, not HTML: tags are stripped but the result is
+not entity-encoded, so 'Tom & Jerry' is stored, exported and emailed as
+typed, and escaping is left to whatever renders it. Only fields allowing
+some tags hold HTML, which keeps bleach's escaping.
+
+Cleaning builds an HTML parse of the value, so plain text is only cleaned
+when it contains '<' (HTML also when it contains '&'), which is almost
+never. bleach's Cleaner is expensive to create and not thread-safe, so one
+is kept per thread for each field configuration.
+"""
+import html
+import threading
+
+from bleach.sanitizer import Cleaner
+from rest_framework import serializers
+
+_cleaners = threading.local()
+
+
+def get_cleaner(tags=frozenset(), strip=True):
+    cleaners = getattr(_cleaners, 'by_config', None)
+    if cleaners is None:
+        cleaners = _cleaners.by_config = {}
+    config = (frozenset(tags), strip)
+    cleaner = cleaners.get(config)
+    if cleaner is None:
+        cleaner = cleaners[config] = Cleaner(tags=config[0], strip=strip)
+    return cleaner
+
+
+def sanitize_text(value, tags=frozenset(), strip=True):
+    """Remove HTML from value, keeping only the given tags"""
+    if tags:
+        if '<' not in value and '&' not in value:
+            return value
+        return get_cleaner(tags, strip).clean(value)
+
+    cleaner = get_cleaner(tags, strip)
+    while '<' in value:
+        # Unescaping can turn escaped markup ('&lt;b&gt;') into tags, so
+        # clean again until nothing more is stripped
+        cleaned = html.unescape(cleaner.clean(value))
+        if cleaned == value:
+            break
+        value = cleaned
+    return value
+
+
+class SanitizedCharField(serializers.CharField):
+    """CharField whose input is passed through sanitize_text (no tags allowed by default)"""
+
+    def __init__(self, **kwargs):
+        self.allowed_tags = frozenset(kwargs.pop('allowed_tags', ()))
+        super().__init__(**kwargs)
+
+    def to_internal_value(self, data):
+        return sanitize_text(super().to_internal_value(data), self.allowed_tags)
+
+
+class SanitizedFieldsMixin:
+    """ModelSerializer mixin building SanitizedCharFields for Meta.sanitized_fields"""
+
+    def build_standard_field(self, field_name, model_field):
+        field_class, field_kwargs = super().build_standard_field(field_name, model_field)
+        if field_name in getattr(self.Meta, 'sanitized_fields', ()):
+            field_class = SanitizedCharField
+        return field_class, field_kwargs
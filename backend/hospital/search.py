@@ -0,0 +1,120 @@
+"""
+Full-text search for list endpoints.
+
+On PostgreSQL, Doctor, News, Appointment and ContactInquiry store a
+weighted tsvector in search_vector. It is maintained by BEFORE INSERT/UPDATE
+triggers, so bulk_create and queryset.update() keep it current too, and it
+is indexed with GIN (both created in migration 0009). Names and email
+addresses are indexed with the 'simple' configuration (lowercased, no
+stemming or stop words), so short prefixes such as "an" or "will" still
+find Anand or William; prose fields use 'english'. FullTextSearchFilter
+matches each ?search= word as a prefix under both configurations and
+orders by rank.
+
+Terms containing '@' or digits (email addresses, phone numbers, ids) are
+split differently by the tsvector parser and the query, so those are
+matched with SearchFilter's icontains lookups over the view's
+search_fields instead.
+
+Other databases (SQLite in development and tests) have no tsvector; there
+the filter falls back to SearchFilter's icontains lookups over the view's
+search_fields.
+"""
+import operator
+import re
+from functools import reduce
+
+from django.contrib.postgres.search import SearchQuery, SearchRank
+from django.core.exceptions import FieldDoesNotExist
+from django.db import connections
+from django.db.models import F, Q
+from rest_framework import filters
+
+# Text search configurations of the indexed columns; queries try both
+SEARCH_CONFIGS = ('simple', 'english')
+
+# Columns in each model's search_vector, their weights (A ranks highest)
+# and configurations; mirrored by migration 0012
+SEARCH_DOCUMENTS = {
+    'hospital.doctor': [
+        ('first_name', 'A', 'simple'), ('last_name', 'A', 'simple'),
+        ('specialization', 'B', 'english'), ('qualifications', 'C', 'english'),
+    ],
+    'hospital.news': [('title', 'A', 'english'), ('excerpt', 'B', 'english'), ('content', 'C', 'english')],
+    'hospital.appointment': [
+        ('patient_name', 'A', 'simple'), ('patient_email', 'A', 'simple'), ('reason', 'C', 'english'),
+    ],
+    'hospital.contactinquiry': [
+        ('name', 'A', 'simple'), ('email', 'A', 'simple'),
+        ('subject', 'B', 'english'), ('message', 'C', 'english'),
+    ],
+}
+
+WORD_RE = re.compile(r'\w+')
+# Terms left to icontains: emails, phone numbers, ids
+LITERAL_RE = re.compile(r'[@\d]')
+
+
+def split_terms(terms):
+    """Split search terms into (words for the tsvector, literal terms)"""
+    words, literals = [], []
+    for term in terms:
+        if LITERAL_RE.search(term):
+            literals.append(term)
+        else:
+            words.extend(WORD_RE.findall(term))
+    return words, literals
+
+
+def prefix_query(words):
+    """SearchQuery matching every word as a prefix under any of SEARCH_CONFIGS"""
+    return reduce(operator.and_, (
+        reduce(operator.or_, (
+            SearchQuery(f'{word}:*', config=config, search_type='raw') for config in SEARCH_CONFIGS
+        ))
+        for word in words
+    ))
+
+
+def has_search_vector(queryset):
+    if connections[queryset.db].vendor != 'postgresql':
+        return False
+    try:
+        queryset.model._meta.get_field('search_vector')
+    except FieldDoesNotExist:
+        return False
+    return True
+
+
+class FullTextSearchFilter(filters.SearchFilter):
+    """
+    SearchFilter backed by the search_vector GIN index on PostgreSQL.
+    List it after OrderingFilter: results are ordered by rank, with the
+    view's ordering as the tie-break, unless ?ordering= is given.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        terms = self.get_search_terms(request)
+        if not terms or not self.get_search_fields(view, request) or not has_search_vector(queryset):
+            return super().filter_queryset(request, queryset, view)
+
+        words, literals = split_terms(terms)
+        if literals:
+            queryset = queryset.filter(self.literal_condition(view, request, literals))
+        if not words:
+            return queryset if literals else queryset.none()
+        query = prefix_query(words)
+        queryset = queryset.filter(search_vector=query)
+        if request.query_params.get(filters.OrderingFilter.ordering_param):
+            return queryset
+        return queryset.annotate(
+            search_rank=SearchRank(F('search_vector'), query)
+        ).order_by('-search_rank', *(queryset.query.order_by or queryset.model._meta.ordering))
+
+    def literal_condition(self, view, request, literals):
+        """Every literal term in one of the view's search_fields, as SearchFilter matches it"""
+        lookups = [self.construct_search(str(field)) for field in self.get_search_fields(view, request)]
+        return reduce(operator.and_, (
+            reduce(operator.or_, (Q(**{lookup: term}) for lookup in lookups))
+            for term in literals
+        ))
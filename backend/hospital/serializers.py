@@ -1,18 +1,34 @@
 from rest_framework import serializers
+from . import counters, slots
+from .reservations import SlotConflict
+from .sanitize import SanitizedFieldsMixin
 from .models import (
     Department, Service, Doctor, DoctorSchedule, Appointment,
     News, ContactInquiry, HospitalInfo, Gallery, Announcement
 )
 
+class DepartmentListSerializer(serializers.ListSerializer):
+    def to_representation(self, data):
+        # Load the services counters for the whole page in one query
+        departments = list(data.all() if hasattr(data, 'all') else data)
+        names = [counters.department_counter(d.pk, 'services') for d in departments]
+        self.context['services_counts'] = counters.get_counters(names)
+        return super().to_representation(departments)
+
 class DepartmentSerializer(serializers.ModelSerializer):
     services_count = serializers.SerializerMethodField()
     
     class Meta:
         model = Department
         fields = ['id', 'name', 'description', 'image', 'is_active', 'services_count']
+        list_serializer_class = DepartmentListSerializer
     
     def get_services_count(self, obj):
-        return obj.services.filter(is_active=True).count()
+        name = counters.department_counter(obj.pk, 'services')
+        preloaded = self.context.get('services_counts', {})
+        if name in preloaded:
+            return preloaded[name]
+        return counters.get_counters([name])[name]
 
 class ServiceSerializer(serializers.ModelSerializer):
     department_name = serializers.CharField(source='department.name', read_only=True)
@@ -62,7 +78,7 @@ class DoctorDetailSerializer(serializers.ModelSerializer):
         return f"Dr. {obj.first_name} {obj.last_name}"
 
 
-class AppointmentCreateSerializer(serializers.ModelSerializer):
+class AppointmentCreateSerializer(SanitizedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = Appointment
         fields = [
@@ -70,36 +86,56 @@ class AppointmentCreateSerializer(serializers.ModelSerializer):
             'patient_gender', 'doctor', 'appointment_date', 'appointment_time',
             'reason'
         ]
+        sanitized_fields = ['patient_name', 'reason']
     
     def validate(self, data):
         # Check if appointment slot is available
         appointment_date = data['appointment_date']
         appointment_time = data['appointment_time']
         doctor = data.get('doctor')
-        
-        # If doctor is specified, check for conflicts with that doctor
-        query = Appointment.objects.filter(
-            appointment_date=appointment_date,
-            appointment_time=appointment_time,
-            status__in=['pending', 'confirmed']
-        )
-        
-        if doctor:
-            query = query.filter(doctor=doctor)
-            if query.exists():
-                raise serializers.ValidationError("This doctor is not available at this time slot.")
-        else:
-            if query.exists():
-                raise serializers.ValidationError("This time slot is already booked.")
-        
+
         # Validate appointment date is not in the past
         from django.utils import timezone
         today = timezone.now().date()
         if appointment_date < today:
             raise serializers.ValidationError("Appointment date cannot be in the past.")
-        
+
+        # If doctor is specified, check the slot index for that doctor's day.
+        # Taken slots raise SlotConflict (409); the unique constraints catch races.
+        if doctor:
+            slot_status = slots.slot_status(doctor.pk, appointment_date, appointment_time)
+            if slot_status == slots.SLOT_UNAVAILABLE:
+                raise serializers.ValidationError("This doctor is not available at this time slot.")
+            if slot_status == slots.SLOT_BOOKED:
+                raise SlotConflict("This doctor is not available at this time slot.")
+        else:
+            query = Appointment.objects.filter(
+                appointment_date=appointment_date,
+                appointment_time=appointment_time,
+                status__in=slots.ACTIVE_STATUSES
+            )
+            if query.exists():
+                raise SlotConflict("This time slot is already booked.")
+
         return data
 
+class AppointmentImportSerializer(SanitizedFieldsMixin, serializers.ModelSerializer):
+    """
+    Field validation for rows loaded by the import_appointments command.
+    Doctors and slot conflicts are checked in bulk by the importer, so
+    validating a row runs no queries; past dates are allowed for history.
+    """
+    doctor = serializers.IntegerField(required=False, allow_null=True)
+    
+    class Meta:
+        model = Appointment
+        fields = [
+            'patient_name', 'patient_email', 'patient_phone', 'patient_age',
+            'patient_gender', 'doctor', 'appointment_date', 'appointment_time',
+            'reason', 'notes', 'status', 'is_emergency'
+        ]
+        sanitized_fields = ['patient_name', 'reason', 'notes']
+
 class AppointmentSerializer(serializers.ModelSerializer):
     doctor_name = serializers.SerializerMethodField()
     
@@ -126,18 +162,20 @@ class NewsDetailSerializer(serializers.ModelSerializer):
         model = News
         fields = ['id', 'title', 'slug', 'content', 'excerpt', 'featured_image', 'author', 'published_date', 'is_featured']
 
-class ContactInquiryCreateSerializer(serializers.ModelSerializer):
+class ContactInquiryCreateSerializer(SanitizedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ContactInquiry
         fields = ['name', 'email', 'phone', 'inquiry_type', 'subject', 'message']
+        sanitized_fields = ['name', 'subject', 'message']
 
-class ContactInquirySerializer(serializers.ModelSerializer):
+class ContactInquirySerializer(SanitizedFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = ContactInquiry
         fields = [
             'id', 'name', 'email', 'phone', 'inquiry_type', 'subject',
             'message', 'is_resolved', 'response', 'created_at'
         ]
+        sanitized_fields = ['name', 'subject', 'message', 'response']
 
 class HospitalInfoSerializer(serializers.ModelSerializer):
     class Meta:
@@ -170,7 +208,12 @@ class DepartmentDetailSerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'description', 'image', 'is_active', 'services', 'doctors', 'services_count', 'doctors_count']
     
     def get_services_count(self, obj):
+        # Annotated by DepartmentDetailView
+        if hasattr(obj, 'services_count'):
+            return obj.services_count
         return obj.services.filter(is_active=True).count()
     
     def get_doctors_count(self, obj):
+        if hasattr(obj, 'doctors_count'):
+            return obj.doctors_count
         return obj.doctors.filter(is_active=True).count()
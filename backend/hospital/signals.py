@@ -0,0 +1,138 @@
+from django.db import models, transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from . import counters, invalidation, outbox, slots
+from .models import Appointment, ContactInquiry, Doctor, DoctorSchedule
+
+# Fields whose pre-save values the handlers below compare against
+PREVIOUS_FIELDS = dict(counters.TRACKED_FIELDS)
+PREVIOUS_FIELDS[Appointment] = ['doctor_id', 'appointment_date', 'appointment_time', 'status']
+
+
+def _active_slot(doctor_id, appointment_date, appointment_time, status):
+    """Return the (doctor, date, time) slot an appointment occupies, if any"""
+    if doctor_id and status in slots.ACTIVE_STATUSES:
+        # An unsaved instance may still hold the strings it was created with
+        return (
+            doctor_id,
+            models.DateField().to_python(appointment_date),
+            models.TimeField().to_python(appointment_time),
+        )
+    return None
+
+
+@receiver(pre_save)
+def remember_previous_values(sender, instance, **kwargs):
+    """Load the stored row once before an update so handlers can diff against it"""
+    fields = PREVIOUS_FIELDS.get(sender)
+    if fields is None:
+        return
+    instance._previous_values = None
+    if instance.pk:
+        instance._previous_values = sender._default_manager.filter(
+            pk=instance.pk
+        ).values(*fields).first()
+
+
+@receiver(pre_save, sender=Appointment)
+def reset_reminders_on_reschedule(sender, instance, **kwargs):
+    """A new date or time gets its own reminders (runs after remember_previous_values)"""
+    previous_values = getattr(instance, '_previous_values', None)
+    if not previous_values:
+        return
+    previous_start = (previous_values['appointment_date'], previous_values['appointment_time'])
+    if previous_start != (instance.appointment_date, instance.appointment_time):
+        instance.day_reminder_sent_at = None
+        instance.hour_reminder_sent_at = None
+
+
+@receiver(post_save, sender=Appointment)
+def update_slot_index_on_save(sender, instance, **kwargs):
+    """Keep the slot index in step with bookings, reschedules and cancellations"""
+    previous_values = getattr(instance, '_previous_values', None)
+    previous = _active_slot(**previous_values) if previous_values else None
+    current = _active_slot(
+        instance.doctor_id, instance.appointment_date,
+        instance.appointment_time, instance.status
+    )
+    if previous == current:
+        return
+
+    days = {slot[:2] for slot in (previous, current) if slot}
+
+    def apply():
+        for doctor_id, appointment_date in days:
+            slots.invalidate_day(doctor_id, appointment_date)
+
+    transaction.on_commit(apply)
+
+
+@receiver(post_delete, sender=Appointment)
+def update_slot_index_on_delete(sender, instance, **kwargs):
+    """Free the slot of a deleted appointment"""
+    current = _active_slot(
+        instance.doctor_id, instance.appointment_date,
+        instance.appointment_time, instance.status
+    )
+    if current:
+        doctor_id, appointment_date = current[:2]
+        transaction.on_commit(lambda: slots.invalidate_day(doctor_id, appointment_date))
+
+
+@receiver(post_save, sender=Appointment)
+def record_appointment_events(sender, instance, created, raw=False, **kwargs):
+    """Queue notifications for new bookings and status changes in the save's transaction"""
+    if raw:
+        return
+    previous_values = getattr(instance, '_previous_values', None)
+    if created:
+        outbox.appointment_created(instance)
+    elif previous_values and previous_values['status'] != instance.status:
+        outbox.appointment_status_changed(instance, previous_values['status'])
+
+
+@receiver(post_save, sender=ContactInquiry)
+def record_inquiry_events(sender, instance, created, raw=False, **kwargs):
+    """Queue the acknowledgement and staff notification for a new inquiry"""
+    if created and not raw:
+        outbox.inquiry_created(instance)
+
+
+@receiver([post_save, post_delete], sender=Doctor)
+def invalidate_slot_index_for_doctor(sender, instance, **kwargs):
+    """Consultation duration or availability changes reshape the slot grid"""
+    doctor_id = instance.pk
+    transaction.on_commit(lambda: slots.invalidate_doctor(doctor_id))
+
+
+@receiver([post_save, post_delete], sender=DoctorSchedule)
+def invalidate_slot_index_for_schedule(sender, instance, **kwargs):
+    """Schedule window changes reshape the slot grid"""
+    doctor_id = instance.doctor_id
+    transaction.on_commit(lambda: slots.invalidate_doctor(doctor_id))
+
+
+@receiver(post_save)
+def update_counters_on_save(sender, instance, raw=False, **kwargs):
+    """Apply the row's change in counter contributions within the save's transaction"""
+    if raw or sender not in counters.TRACKED_FIELDS:
+        return
+    counters.apply_deltas(counters.deltas_between(
+        sender, getattr(instance, '_previous_values', None), counters.current_values(instance)
+    ))
+
+
+@receiver(post_delete)
+def update_counters_on_delete(sender, instance, **kwargs):
+    """Remove a deleted row's counter contributions"""
+    if sender not in counters.TRACKED_FIELDS:
+        return
+    counters.apply_deltas(counters.deltas_between(sender, counters.current_values(instance), None))
+
+
+@receiver([post_save, post_delete])
+def bump_generation_on_write(sender, **kwargs):
+    """Invalidate every cache built from this model once the write commits"""
+    if invalidation.is_tracked(sender):
+        invalidation.model_changed(sender)
@@ -0,0 +1,189 @@
+"""
+Per-doctor slot availability index.
+
+The entry for a (doctor, date) pair combines two cached parts: the slot
+grid for that weekday, derived from the doctor's DoctorSchedule window
+(stepped by consultation_duration), and the set of slots already taken by
+active appointments that day. Booking checks and free-slot listings read
+the entry instead of querying the Appointment table.
+
+A doctor without a schedule for a weekday has no grid for it (slots is
+None): any time that day can be booked unless it is taken, as before
+schedules were enforced.
+
+Cached parts are never patched in place. Each booked set lives under a
+per-(doctor, date) version that booking changes on that day bump (see
+signals.py), so a booking only costs the next reader of its own day one
+query, and a concurrent rebuild can only ever write under a version nobody
+reads any more. Grids live under a per-doctor version that schedule and
+profile changes bump.
+"""
+from datetime import datetime, timedelta
+
+from django.conf import settings
+
+from .cache import bump_version, cache_key, get_cache, get_version
+from .models import Appointment, Doctor, DoctorSchedule
+
+ACTIVE_STATUSES = Appointment.ACTIVE_STATUSES
+
+SLOT_FREE = 'free'
+SLOT_BOOKED = 'booked'
+SLOT_UNAVAILABLE = 'unavailable'
+
+SLOT_INDEX_TIMEOUT = getattr(settings, 'SLOT_INDEX_TIMEOUT', 60 * 60)
+
+
+def normalize_time(value):
+    """Drop sub-minute precision so times compare against the slot grid"""
+    return value.replace(second=0, microsecond=0)
+
+
+def build_slot_grid(start_time, end_time, duration):
+    """Return the slot start times that fit inside a schedule window"""
+    slots = []
+    day = datetime(2000, 1, 1)
+    current = datetime.combine(day, normalize_time(start_time))
+    end = datetime.combine(day, end_time)
+    step = timedelta(minutes=duration)
+    while current + step <= end:
+        slots.append(current.time())
+        current += step
+    return slots
+
+
+def _doctor_version_key(doctor_id):
+    return cache_key('slot_index_version', doctor_id)
+
+
+def _day_version_key(doctor_id, date):
+    return cache_key('slot_index_version', doctor_id, date.isoformat())
+
+
+def _grid_key(doctor_id, version, weekday):
+    return cache_key('slot_grid', doctor_id, f'v{version}', weekday)
+
+
+def _booked_key(doctor_id, date, version):
+    return cache_key('slot_booked', doctor_id, date.isoformat(), f'v{version}')
+
+
+def _build_grids(doctor_id, weekdays):
+    """Slot grid of each weekday: a frozenset, or None where any time may be booked"""
+    doctor = Doctor.objects.filter(pk=doctor_id).only(
+        'consultation_duration', 'is_available', 'is_active'
+    ).first()
+    if not (doctor and doctor.is_active and doctor.is_available):
+        return {weekday: frozenset() for weekday in weekdays}
+
+    # Unscheduled weekday: no grid for a bookable doctor
+    grids = dict.fromkeys(weekdays)
+    schedules = DoctorSchedule.objects.filter(
+        doctor_id=doctor_id, day_of_week__in=weekdays, is_active=True
+    )
+    for schedule in schedules:
+        grids[schedule.day_of_week] = frozenset(build_slot_grid(
+            schedule.start_time, schedule.end_time, doctor.consultation_duration
+        ))
+    return grids
+
+
+def _build_booked(doctor_id, dates):
+    """Slot times taken by active appointments on each date"""
+    booked = {date: set() for date in dates}
+    appointments = Appointment.objects.filter(
+        doctor_id=doctor_id,
+        appointment_date__in=dates,
+        status__in=ACTIVE_STATUSES
+    ).values_list('appointment_date', 'appointment_time')
+    for appointment_date, appointment_time in appointments:
+        booked[appointment_date].add(normalize_time(appointment_time))
+    return {date: frozenset(times) for date, times in booked.items()}
+
+
+def get_range_entries(doctor_id, dates):
+    """
+    Return index entries ({'slots', 'booked'}) for several days of one
+    doctor with two cache reads: the versions, then the grids and booked
+    sets under them. Missing parts are built together and stored in one write.
+    """
+    cache = get_cache()
+    version_keys = [_doctor_version_key(doctor_id)] + [_day_version_key(doctor_id, date) for date in dates]
+    stored = cache.get_many(version_keys)
+    doctor_version, *day_versions = [
+        stored[key] if key in stored else get_version(key) for key in version_keys
+    ]
+
+    grid_keys = {
+        weekday: _grid_key(doctor_id, doctor_version, weekday)
+        for weekday in {date.weekday() for date in dates}
+    }
+    booked_keys = {
+        date: _booked_key(doctor_id, date, version) for date, version in zip(dates, day_versions)
+    }
+    cached = cache.get_many([*grid_keys.values(), *booked_keys.values()])
+    # Grids are wrapped so that None (unscheduled) is not mistaken for a miss
+    grids = {weekday: cached[key][0] for weekday, key in grid_keys.items() if key in cached}
+    booked = {date: cached[key] for date, key in booked_keys.items() if key in cached}
+
+    new_entries = {}
+    missing_weekdays = [weekday for weekday in grid_keys if weekday not in grids]
+    if missing_weekdays:
+        built = _build_grids(doctor_id, missing_weekdays)
+        grids.update(built)
+        new_entries.update({grid_keys[weekday]: (grid,) for weekday, grid in built.items()})
+    missing_dates = [date for date in dates if date not in booked]
+    if missing_dates:
+        built = _build_booked(doctor_id, missing_dates)
+        booked.update(built)
+        new_entries.update({booked_keys[date]: times for date, times in built.items()})
+    if new_entries:
+        cache.set_many(new_entries, SLOT_INDEX_TIMEOUT)
+
+    return {
+        date: {'slots': grids[date.weekday()], 'booked': booked[date]}
+        for date in dates
+    }
+
+
+def get_day_entry(doctor_id, date):
+    """Return the index entry for a doctor's day, building missing parts"""
+    return get_range_entries(doctor_id, [date])[date]
+
+
+def free_slots_from_entry(entry):
+    """Sorted free slot start times of an index entry (none for unscheduled days)"""
+    if entry['slots'] is None:
+        return []
+    return sorted(t for t in entry['slots'] if t not in entry['booked'])
+
+
+def get_free_slots(doctor_id, date):
+    """Sorted list of free slot start times for a doctor on a date"""
+    return free_slots_from_entry(get_day_entry(doctor_id, date))
+
+
+def slot_status(doctor_id, date, slot_time):
+    """Classify a slot as SLOT_FREE, SLOT_BOOKED or SLOT_UNAVAILABLE (off schedule)"""
+    entry = get_day_entry(doctor_id, date)
+    slot_time = normalize_time(slot_time)
+    if entry['slots'] is not None and slot_time not in entry['slots']:
+        return SLOT_UNAVAILABLE
+    if slot_time in entry['booked']:
+        return SLOT_BOOKED
+    return SLOT_FREE
+
+
+def is_slot_free(doctor_id, date, slot_time):
+    """True if the time is on the doctor's slot grid for that day and not booked"""
+    return slot_status(doctor_id, date, slot_time) == SLOT_FREE
+
+
+def invalidate_day(doctor_id, date):
+    """Drop a doctor's booked slots for one day after a booking change there"""
+    bump_version(_day_version_key(doctor_id, date))
+
+
+def invalidate_doctor(doctor_id):
+    """Drop a doctor's slot grids after a schedule or profile change"""
+    bump_version(_doctor_version_key(doctor_id))
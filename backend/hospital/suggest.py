@@ -0,0 +1,154 @@
+"""
+In-memory typeahead over doctor, service and department names.
+
+The corpus is small (a few hundred rows), so each process keeps a
+SuggestionIndex built from it. Query words are matched against the
+distinct words of the corpus, by prefix and by trigram similarity (pg_trgm
+style: words padded with two leading blanks and one trailing blank), so
+misspellings still match. Entries whose words all match by prefix rank
+first. The index is rebuilt when the Doctor, Service or Department
+generation changes (see invalidation.py); generations are re-read at most
+once per LOCAL_REVALIDATE_INTERVAL, so a lookup normally touches neither
+the cache nor the database.
+"""
+import heapq
+import re
+import time
+import unicodedata
+
+from . import invalidation
+from .models import Department, Doctor, Service
+from .response_cache import LOCAL_REVALIDATE_INTERVAL
+
+SOURCE_MODELS = invalidation.register('search_suggest', Doctor, Service, Department)
+
+# Below this trigram similarity a non-prefix match is not suggested
+MIN_SIMILARITY = 0.3
+
+WORD_RE = re.compile(r'\w+')
+
+
+def normalize(text):
+    """Lowercase and strip accents, so 'Désai' matches 'desai'"""
+    decomposed = unicodedata.normalize('NFKD', text or '')
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def words(text):
+    return WORD_RE.findall(normalize(text))
+
+
+def trigrams(word):
+    padded = f'  {word} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    return len(a & b) / len(a | b)
+
+
+class SuggestionIndex:
+    def __init__(self, entries):
+        # entries: dicts with type, id, label, detail and the text to match
+        self.entries = entries
+        # Distinct words -> entries containing them, their trigrams, and
+        # trigram/prefix postings over the words (the vocabulary is much
+        # smaller than the entry list, so matching happens per word)
+        self.word_entries = {}
+        for position, entry in enumerate(entries):
+            for word in words(entry.pop('text')):
+                self.word_entries.setdefault(word, set()).add(position)
+        self.word_trigrams = {word: trigrams(word) for word in self.word_entries}
+        self.prefixes = {}
+        self.postings = {}
+        for word, grams in self.word_trigrams.items():
+            for end in range(1, len(word) + 1):
+                self.prefixes.setdefault(word[:end], set()).add(word)
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(word)
+
+    def matching_words(self, query_word):
+        """Words the query word is a prefix of or similar to, with their similarity"""
+        grams = trigrams(query_word)
+        candidates = set()
+        for gram in grams:
+            candidates |= self.postings.get(gram, set())
+        prefixed = self.prefixes.get(query_word, set())
+        matches = {}
+        for word in candidates | prefixed:
+            score = similarity(grams, self.word_trigrams[word])
+            if word in prefixed or score >= MIN_SIMILARITY:
+                matches[word] = score
+        return matches, prefixed
+
+    def search(self, query, limit=8, types=None):
+        query_words = words(query)
+        if not query_words:
+            return []
+
+        # Per entry: the best similarity for each query word, and whether
+        # every query word starts some word of the entry
+        best = {}
+        prefix_hits = None
+        for index, query_word in enumerate(query_words):
+            matches, prefixed = self.matching_words(query_word)
+            hits = set()
+            for word, score in matches.items():
+                for position in self.word_entries[word]:
+                    scores = best.setdefault(position, [0.0] * len(query_words))
+                    scores[index] = max(scores[index], score)
+                    if word in prefixed:
+                        hits.add(position)
+            prefix_hits = hits if prefix_hits is None else prefix_hits & hits
+
+        scored = []
+        for position, scores in best.items():
+            entry = self.entries[position]
+            if types and entry['type'] not in types:
+                continue
+            score = sum(scores) / len(scores)
+            is_prefix = position in prefix_hits
+            if not is_prefix and score < MIN_SIMILARITY:
+                continue
+            scored.append((not is_prefix, -score, entry['label'], position))
+        return [self.entries[position] for *_, position in heapq.nsmallest(limit, scored)]
+
+
+def build_index():
+    entries = []
+    doctors = Doctor.objects.filter(is_active=True).values_list(
+        'id', 'first_name', 'last_name', 'specialization'
+    )
+    for pk, first_name, last_name, specialization in doctors:
+        entries.append({
+            'type': 'doctor', 'id': pk,
+            'label': f'Dr. {first_name} {last_name}', 'detail': specialization,
+            'text': f'{first_name} {last_name} {specialization}',
+        })
+    services = Service.objects.filter(is_active=True).values_list('id', 'name', 'department__name')
+    for pk, name, department_name in services:
+        entries.append({
+            'type': 'service', 'id': pk, 'label': name, 'detail': department_name, 'text': name,
+        })
+    for pk, name in Department.objects.filter(is_active=True).values_list('id', 'name'):
+        entries.append({'type': 'department', 'id': pk, 'label': name, 'detail': '', 'text': name})
+    return SuggestionIndex(entries)
+
+
+_state = {'index': None, 'generations': None, 'checked_at': None}
+
+
+def get_index():
+    """This process's index, rebuilt after writes to the source models"""
+    now = time.monotonic()
+    if _state['checked_at'] is None or now - _state['checked_at'] >= LOCAL_REVALIDATE_INTERVAL:
+        generations = invalidation.generations(SOURCE_MODELS)
+        if generations != _state['generations'] or _state['index'] is None:
+            _state['index'] = build_index()
+            _state['generations'] = generations
+        _state['checked_at'] = now
+    return _state['index']
+
+
+def suggest(query, limit=8, types=None):
+    return get_index().search(query, limit=limit, types=types)
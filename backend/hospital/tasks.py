@@ -0,0 +1,31 @@
+from celery import shared_task
+from django.conf import settings
+from django.db import OperationalError
+
+from . import counters, outbox, reminders
+from .cache import get_cache
+
+
+@shared_task(autoretry_for=(OperationalError,), retry_backoff=True, max_retries=5)
+def dispatch_outbox():
+    """Deliver due outbox events a batch at a time until none are left"""
+    # Let the next committed event schedule another run
+    get_cache().delete(outbox.DISPATCH_SCHEDULED_KEY)
+    processed = 0
+    while True:
+        count = outbox.dispatch()
+        processed += count
+        if count < settings.OUTBOX_BATCH_SIZE:
+            return processed
+
+
+@shared_task(autoretry_for=(OperationalError,), retry_backoff=True, max_retries=3)
+def send_appointment_reminders():
+    """Queue the day-before and hour-before reminders that are due"""
+    return reminders.send_due_reminders()
+
+
+@shared_task(autoretry_for=(OperationalError,), retry_backoff=True, max_retries=3)
+def reconcile_counters():
+    """Recompute the dashboard counters, dropping drift from deltas lost after commit"""
+    return len(counters.reconcile_counters())
@@ -0,0 +1,978 @@
+import csv
+import json
+import tempfile
+from datetime import date, datetime, time, timedelta
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.functional import SimpleLazyObject
+from rest_framework.test import APIClient
+
+from . import announcements, counters, notifications, outbox, reminders, slots, suggest
+from .cache import cache_key, get_cache
+from .dashboard import get_dashboard_stats
+from .middleware import RequestSecurityMiddleware, is_locked_out, record_failed_attempt
+from .models import (
+    Announcement, Appointment, ContactInquiry, DashboardCounter, Department, Doctor,
+    DoctorSchedule, Gallery, HospitalInfo, OutboxEvent, Service
+)
+from .pagination import AppointmentPagination, ContactInquiryPagination
+from .query_budget import check_query_budgets, over_budget
+from .ratelimit import RateLimiter
+from .sanitize import sanitize_text
+from .search import split_terms
+from .reservations import SlotConflict, is_slot_conflict, reserve_appointment
+from .serializers import AppointmentCreateSerializer
+from .views import HospitalInfoView
+
+API_KEY = 'hospital-api-key-2024'
+
+
+def create_doctor(department=None, **kwargs):
+    department = department or Department.objects.create(name='Ophthalmology', description='Eye care')
+    fields = dict(
+        first_name='Asha', last_name='Rao', email='asha@example.com', phone='+919000000000',
+        gender='F', date_of_birth=date(1980, 1, 1), medical_license='LIC-1',
+        specialization='Cornea', department=department, years_of_experience=10,
+        qualifications='MBBS, MS', bio='', consultation_fee=500, consultation_duration=30,
+    )
+    fields.update(kwargs)
+    return Doctor.objects.create(**fields)
+
+
+def appointment_fields(**kwargs):
+    fields = dict(
+        patient_name='Ravi Kumar', patient_email='ravi@example.com', patient_phone='+919811111111',
+        patient_age=40, patient_gender='M', appointment_date=date.today() + timedelta(days=7),
+        appointment_time=time(10, 0), reason='Blurred vision',
+    )
+    fields.update(kwargs)
+    return fields
+
+
+def next_weekday(weekday, after=None):
+    day = (after or date.today()) + timedelta(days=1)
+    while day.weekday() != weekday:
+        day += timedelta(days=1)
+    return day
+
+
+class HospitalTestCase(TestCase):
+    def setUp(self):
+        get_cache().clear()
+
+    def admin_client(self):
+        admin = User.objects.create_user('admin', password='x', is_staff=True, is_superuser=True)
+        client = APIClient()
+        client.force_authenticate(admin)
+        return client
+
+
+class SlotIndexTests(HospitalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.doctor = create_doctor()
+        self.monday = next_weekday(0)
+        DoctorSchedule.objects.create(
+            doctor=self.doctor, day_of_week=0, start_time=time(9), end_time=time(12)
+        )
+
+    def book(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            return Appointment.objects.create(
+                doctor=self.doctor, **appointment_fields(**{'appointment_date': self.monday, **kwargs})
+            )
+
+    def test_scheduled_day_uses_the_slot_grid(self):
+        self.assertEqual(slots.slot_status(self.doctor.pk, self.monday, time(9, 30)), slots.SLOT_FREE)
+        self.assertEqual(slots.slot_status(self.doctor.pk, self.monday, time(9, 17)), slots.SLOT_UNAVAILABLE)
+        self.assertEqual(slots.get_free_slots(self.doctor.pk, self.monday)[:2], [time(9), time(9, 30)])
+
+    def test_unscheduled_day_accepts_any_free_time(self):
+        tuesday = next_weekday(1)
+        self.assertEqual(slots.slot_status(self.doctor.pk, tuesday, time(9, 17)), slots.SLOT_FREE)
+        self.assertEqual(slots.get_free_slots(self.doctor.pk, tuesday), [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.create(
+                doctor=self.doctor, **appointment_fields(appointment_date=tuesday, appointment_time=time(9, 17))
+            )
+        self.assertEqual(slots.slot_status(self.doctor.pk, tuesday, time(9, 17)), slots.SLOT_BOOKED)
+
+    def test_bookings_and_cancellations_invalidate_the_index(self):
+        self.assertEqual(slots.slot_status(self.doctor.pk, self.monday, time(10)), slots.SLOT_FREE)
+        appointment = self.book()
+        self.assertEqual(slots.slot_status(self.doctor.pk, self.monday, time(10)), slots.SLOT_BOOKED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.status = 'cancelled'
+            appointment.save()
+        self.assertEqual(slots.slot_status(self.doctor.pk, self.monday, time(10)), slots.SLOT_FREE)
+
+    def test_booking_only_rebuilds_its_own_day(self):
+        next_monday = self.monday + timedelta(days=7)
+        slots.get_range_entries(self.doctor.pk, [self.monday, next_monday])
+        self.book()
+        with self.assertNumQueries(0):
+            self.assertEqual(slots.slot_status(self.doctor.pk, next_monday, time(10)), slots.SLOT_FREE)
+        # The grid is still cached: only the day's bookings are read again
+        with self.assertNumQueries(1):
+            self.assertEqual(slots.slot_status(self.doctor.pk, self.monday, time(10)), slots.SLOT_BOOKED)
+
+    def test_booking_with_string_values(self):
+        self.book(appointment_date=self.monday.isoformat(), appointment_time='10:00')
+        self.assertEqual(slots.slot_status(self.doctor.pk, self.monday, time(10)), slots.SLOT_BOOKED)
+
+    def test_schedule_changes_rebuild_the_grid(self):
+        self.assertEqual(slots.slot_status(self.doctor.pk, self.monday, time(13)), slots.SLOT_UNAVAILABLE)
+        with self.captureOnCommitCallbacks(execute=True):
+            DoctorSchedule.objects.get(doctor=self.doctor).delete()
+        self.assertEqual(slots.slot_status(self.doctor.pk, self.monday, time(13)), slots.SLOT_FREE)
+
+    def test_unavailable_doctor_has_no_free_slots(self):
+        slots.get_free_slots(self.doctor.pk, self.monday)
+        self.doctor.is_available = False
+        with self.captureOnCommitCallbacks(execute=True):
+            self.doctor.save()
+        self.assertEqual(slots.get_free_slots(self.doctor.pk, self.monday), [])
+        self.assertEqual(slots.slot_status(self.doctor.pk, self.monday, time(10)), slots.SLOT_UNAVAILABLE)
+
+
+class DoctorAvailabilityTests(HospitalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.doctor = create_doctor()
+        self.monday = next_weekday(0)
+        DoctorSchedule.objects.create(
+            doctor=self.doctor, day_of_week=0, start_time=time(9), end_time=time(12)
+        )
+        self.url = f'/api/doctors/{self.doctor.pk}/availability/'
+
+    def test_days_list_free_slots_and_whether_they_are_scheduled(self):
+        Appointment.objects.create(doctor=self.doctor, **appointment_fields(appointment_date=self.monday))
+        tuesday = self.monday + timedelta(days=1)
+        response = self.client.get(
+            self.url, {'start_date': self.monday.isoformat(), 'end_date': tuesday.isoformat()}
+        )
+        self.assertEqual(response.status_code, 200)
+        monday, tuesday = response.json()['availability']
+        self.assertTrue(monday['scheduled'])
+        self.assertEqual(monday['slots'], ['09:00:00', '09:30:00', '10:30:00', '11:00:00', '11:30:00'])
+        self.assertFalse(tuesday['scheduled'])
+        self.assertEqual(tuesday['slots'], [])
+
+    def test_defaults_to_the_next_week(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.json()['availability']), 7)
+
+    def test_bad_ranges_are_rejected(self):
+        start = self.monday.isoformat()
+        for params in [
+            {'start_date': 'soon'},
+            {'start_date': start, 'end_date': (self.monday - timedelta(days=1)).isoformat()},
+            {'start_date': start, 'end_date': (self.monday + timedelta(days=31)).isoformat()},
+        ]:
+            self.assertEqual(self.client.get(self.url, params).status_code, 400, params)
+
+    def test_unknown_doctor_is_404(self):
+        self.assertEqual(self.client.get('/api/doctors/999/availability/').status_code, 404)
+
+
+class ReservationTests(HospitalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.doctor = create_doctor()
+
+    def book(self, **kwargs):
+        data = appointment_fields(doctor=self.doctor.pk, **kwargs)
+        return self.client.post(f'/api/appointments/?api_key={API_KEY}', data, content_type='application/json')
+
+    def test_second_booking_of_a_slot_gets_409(self):
+        self.assertEqual(self.book().status_code, 201)
+        response = self.book(patient_name='Someone Else')
+        self.assertEqual(response.status_code, 409)
+
+    def test_cancelled_booking_frees_the_slot(self):
+        Appointment.objects.create(doctor=self.doctor, **appointment_fields(status='cancelled'))
+        self.assertEqual(self.book().status_code, 201)
+
+    def test_race_lost_in_the_database_is_a_conflict(self):
+        serializer = AppointmentCreateSerializer(data=appointment_fields(doctor=self.doctor.pk))
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        # Another request books the slot after this one was validated
+        Appointment.objects.create(doctor=self.doctor, **appointment_fields())
+        with self.assertRaises(SlotConflict):
+            reserve_appointment(serializer)
+
+    def test_only_slot_constraints_count_as_conflicts(self):
+        Appointment.objects.create(doctor=self.doctor, **appointment_fields())
+        with self.assertRaises(IntegrityError) as slot_error, transaction.atomic():
+            Appointment.objects.create(doctor=self.doctor, **appointment_fields())
+        self.assertTrue(is_slot_conflict(slot_error.exception))
+
+        with self.assertRaises(IntegrityError) as other_error, transaction.atomic():
+            Appointment.objects.create(**appointment_fields(status='cancelled', patient_age=-1))
+        self.assertFalse(is_slot_conflict(other_error.exception))
+
+
+class RateLimiterTests(HospitalTestCase):
+    def test_rejected_requests_are_not_counted(self):
+        limiter = RateLimiter('test', (2, 3600))
+        self.assertEqual([limiter.allow('client') for _ in range(5)], [True, True, False, False, False])
+        window = int(timezone.now().timestamp() // 3600)
+        self.assertEqual(get_cache().get(limiter.key('client', window)), 2)
+
+    def test_clients_are_limited_separately(self):
+        limiter = RateLimiter('test', '1/min')
+        self.assertTrue(limiter.allow('a'))
+        self.assertFalse(limiter.allow('a'))
+        self.assertTrue(limiter.allow('b'))
+
+    @override_settings(RATE_LIMITS={
+        **settings.RATE_LIMITS, 'appointment_create': '1/min', 'contact_create': '1/min', 'dashboard_stats': '1/min',
+    })
+    def test_throttled_endpoints_answer_alike(self):
+        admin = self.admin_client()
+        requests = [
+            lambda: self.client.post(f'/api/appointments/?api_key={API_KEY}', {}),
+            lambda: self.client.post(f'/api/contact/?api_key={API_KEY}', {}),
+            lambda: admin.get(f'/api/dashboard/stats/?api_key={API_KEY}'),
+        ]
+        for request in requests:
+            request()
+            response = request()
+            self.assertEqual(response.status_code, 429)
+            self.assertIn('throttled', response.json()['detail'])
+            self.assertGreater(int(response['Retry-After']), 0)
+
+
+class DepartmentQueryCountTests(HospitalTestCase):
+    @override_settings(RESPONSE_CACHE_ENABLED=False)
+    def test_department_endpoints_run_a_fixed_number_of_queries(self):
+        doctor = create_doctor()
+        create_doctor(department=doctor.department, email='b@example.com', medical_license='LIC-2')
+        for name in ('Cataract surgery', 'Eye exam'):
+            Service.objects.create(name=name, description='', department=doctor.department, price_range='-')
+        Department.objects.create(name='Cardiology', description='Heart care')
+        counters.reconcile_counters()
+
+        # List: pagination COUNT + departments + one read of the services counters
+        with self.assertNumQueries(3):
+            response = self.client.get('/api/departments/')
+        self.assertEqual(
+            {row['name']: row['services_count'] for row in response.json()['results']},
+            {'Cardiology': 0, 'Ophthalmology': 2},
+        )
+        # Detail: one annotated SELECT + prefetches for services and doctors
+        with self.assertNumQueries(3):
+            response = self.client.get(f'/api/departments/{doctor.department_id}/')
+        self.assertEqual(response.json()['doctors_count'], 2)
+        self.assertEqual(len(response.json()['services']), 2)
+
+
+class QueryBudgetTests(HospitalTestCase):
+    def test_endpoints_stay_within_their_query_budget(self):
+        results = check_query_budgets()
+        self.assertTrue(results)
+        failures = over_budget(results)
+        self.assertEqual(failures, [], '\n'.join(
+            f"{result['path']}: {result['queries']}/{result['budget']} queries, "
+            f"status {result['status']}\n    " + '\n    '.join(result['sql'])
+            for result in failures
+        ))
+
+
+class DashboardStatsTests(HospitalTestCase):
+    def setUp(self):
+        super().setUp()
+        with self.captureOnCommitCallbacks(execute=True):
+            doctor = create_doctor()
+            Department.objects.create(name='Cardiology', description='Heart care', is_active=False)
+            Service.objects.create(name='Eye exam', description='', department=doctor.department, price_range='-')
+            Appointment.objects.create(doctor=doctor, **appointment_fields(appointment_date=timezone.localdate()))
+            Appointment.objects.create(**appointment_fields(status='confirmed'))
+            ContactInquiry.objects.create(name='A', email='a@example.com', subject='S', message='M')
+            Announcement.objects.create(title='Eye camp', content='Free', start_date=timezone.now())
+
+    def test_stats_count_active_rows(self):
+        self.assertEqual(get_dashboard_stats(), {
+            'total_departments': 1,
+            'total_services': 1,
+            'total_doctors': 1,
+            'pending_appointments': 1,
+            'today_appointments': 1,
+            'unresolved_inquiries': 1,
+            'active_announcements': 1,
+        })
+
+    def test_stats_are_cached_until_a_counted_model_changes(self):
+        get_dashboard_stats()
+        with self.assertNumQueries(0):
+            get_dashboard_stats()
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.create(**appointment_fields(appointment_time=time(11)))
+        self.assertEqual(get_dashboard_stats()['pending_appointments'], 2)
+
+    def test_endpoint_is_for_admins_with_an_api_key(self):
+        url = f'/api/dashboard/stats/?api_key={API_KEY}'
+        self.assertEqual(self.client.get(url).status_code, 403)
+        admin = self.admin_client()
+        self.assertEqual(admin.get('/api/dashboard/stats/').status_code, 401)
+        response = admin.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['total_doctors'], 1)
+
+
+class CounterTests(HospitalTestCase):
+    def counter(self, name):
+        return DashboardCounter.objects.get(name=name).value
+
+    def test_hot_counters_change_after_commit(self):
+        counters.reconcile_counters()
+        with self.captureOnCommitCallbacks() as callbacks:
+            Appointment.objects.create(**appointment_fields())
+            self.assertEqual(self.counter('pending_appointments'), 0)
+        for callback in callbacks:
+            callback()
+        self.assertEqual(self.counter('pending_appointments'), 1)
+
+    def test_write_seeds_a_missing_counter_including_itself(self):
+        doctor = create_doctor()
+        DashboardCounter.objects.filter(name=f'department:{doctor.department_id}:doctors').delete()
+        create_doctor(department=doctor.department, email='b@example.com', medical_license='LIC-2')
+        self.assertEqual(self.counter(f'department:{doctor.department_id}:doctors'), 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            ContactInquiry.objects.create(name='A', email='a@example.com', subject='S', message='M')
+        DashboardCounter.objects.filter(name='unresolved_inquiries').delete()
+        with self.captureOnCommitCallbacks(execute=True):
+            ContactInquiry.objects.create(name='B', email='b@example.com', subject='S', message='M')
+        self.assertEqual(counters.get_counters(['unresolved_inquiries']), {'unresolved_inquiries': 2})
+
+    def test_moving_a_doctor_updates_both_departments(self):
+        doctor = create_doctor()
+        ophthalmology = doctor.department
+        cardiology = Department.objects.create(name='Cardiology', description='Heart care')
+        counters.reconcile_counters()
+        doctor.department = cardiology
+        doctor.save()
+        self.assertEqual(self.counter(counters.department_counter(ophthalmology.pk, 'doctors')), 0)
+        self.assertEqual(self.counter(counters.department_counter(cardiology.pk, 'doctors')), 1)
+
+    def test_values_given_as_strings(self):
+        day = date.today() + timedelta(days=3)
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.create(**appointment_fields(appointment_date=day.isoformat(), appointment_time='10:00'))
+        self.assertEqual(counters.get_counters([counters.appointments_on_counter(day)]),
+                         {counters.appointments_on_counter(day): 1})
+
+    def test_raw_saves_are_left_to_reconcile(self):
+        counters.reconcile_counters()
+        # As loaddata saves it: no auto_now values are filled in
+        appointment = Appointment(created_at=timezone.now(), updated_at=timezone.now(), **appointment_fields())
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment.save_base(raw=True)
+        self.assertEqual(self.counter('pending_appointments'), 0)
+        self.assertEqual(counters.reconcile_counters()['pending_appointments'], 1)
+
+
+class ResponseCacheTests(HospitalTestCase):
+    url = '/api/departments/'
+
+    def setUp(self):
+        super().setUp()
+        self.department = Department.objects.create(name='Ophthalmology', description='Eye care')
+
+    def test_responses_carry_validators(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response['ETag'].startswith('"'))
+        self.assertIn('Last-Modified', response)
+        self.assertIn('no-cache', response['Cache-Control'])
+
+    def test_repeated_requests_are_served_from_the_cache(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            second = self.client.get(self.url)
+        self.assertEqual(second.content, first.content)
+        self.assertEqual(second['ETag'], first['ETag'])
+
+    def test_conditional_requests_get_304(self):
+        first = self.client.get(self.url)
+        with self.assertNumQueries(0):
+            response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+        response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=first['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_writes_to_a_listed_model_change_the_response(self):
+        first = self.client.get(self.url)
+        self.department.description = 'Eyes and vision'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.department.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=first['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], first['ETag'])
+        self.assertEqual(response.json()['results'][0]['description'], 'Eyes and vision')
+
+    def test_query_strings_are_cached_separately(self):
+        self.client.get(self.url)
+        response = self.client.get(self.url, {'search': 'cardio'})
+        self.assertEqual(response.json()['results'], [])
+
+
+class AnnouncementListTests(HospitalTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        Announcement.objects.create(title='Holiday hours', content='Closed', start_date=now - timedelta(days=2))
+        Announcement.objects.create(
+            title='Eye camp', content='Free screening', start_date=now - timedelta(days=1), is_urgent=True
+        )
+        Announcement.objects.create(title='Expired', content='Old', start_date=now - timedelta(days=9),
+                                    end_date=now - timedelta(days=8))
+
+    def titles(self, query=''):
+        response = self.client.get(f'/api/announcements/{query}')
+        self.assertEqual(response.status_code, 200)
+        return [row['title'] for row in response.json()['results']]
+
+    def test_active_announcements_urgent_first(self):
+        self.assertEqual(self.titles(), ['Eye camp', 'Holiday hours'])
+
+    def test_filter_backends_apply(self):
+        self.assertEqual(self.titles('?ordering=title'), ['Eye camp', 'Holiday hours'])
+        self.assertEqual(self.titles('?ordering=-title'), ['Holiday hours', 'Eye camp'])
+        self.assertEqual(self.titles('?search=screening'), ['Eye camp'])
+
+    def test_browsable_api_renders(self):
+        response = self.client.get('/api/announcements/?format=api')
+        self.assertEqual(response.status_code, 200)
+
+    def test_writes_invalidate_the_cached_set(self):
+        self.titles()
+        announcement = Announcement.objects.get(title='Eye camp')
+        announcement.is_active = False
+        with self.captureOnCommitCallbacks(execute=True):
+            announcement.save()
+        self.assertEqual(self.titles(), ['Holiday hours'])
+
+    def test_cached_set_expires_at_the_next_boundary(self):
+        starts = timezone.now() + timedelta(seconds=90)
+        upcoming = Announcement.objects.create(title='Camp', content='Soon', start_date=starts)
+        self.assertNotIn(upcoming.pk, announcements.active_announcement_ids())
+        self.assertTrue(80 <= announcements.seconds_until_change() <= 91)
+
+        ids, boundary = announcements.compute_active_window(starts + timedelta(seconds=1))
+        self.assertIn(upcoming.pk, ids)
+
+
+class LocalHospitalInfoCacheTests(HospitalTestCase):
+    url = '/api/hospital-info/'
+
+    def setUp(self):
+        super().setUp()
+        # Process memory outlives each test's database
+        store = HospitalInfoView._local_store
+        store.entries, store.generations, store.checked_at = {}, None, None
+        self.info = HospitalInfo.objects.create(
+            name='City Eye Hospital', description='Eye care', address='MG Road',
+            phone_primary='+918000000000', email_primary='info@example.com',
+            emergency_phone='+918000000001', operating_hours='9-5',
+        )
+
+    def edit_name(self, name):
+        self.info.name = name
+        with self.captureOnCommitCallbacks(execute=True):
+            self.info.save()
+
+    def test_hits_are_served_from_process_memory(self):
+        self.assertEqual(self.client.get(self.url).json()['name'], 'City Eye Hospital')
+        # Inside the revalidation interval not even the shared generations are read
+        with self.assertNumQueries(0), \
+                mock.patch('hospital.response_cache.invalidation.generations') as generations:
+            self.assertEqual(self.client.get(self.url).json()['name'], 'City Eye Hospital')
+        generations.assert_not_called()
+
+    def test_edits_are_picked_up_after_the_revalidation_interval(self):
+        self.client.get(self.url)
+        with mock.patch('hospital.response_cache.LOCAL_REVALIDATE_INTERVAL', 3600):
+            self.edit_name('City Eye Institute')
+            self.assertEqual(self.client.get(self.url).json()['name'], 'City Eye Hospital')
+        with mock.patch('hospital.response_cache.LOCAL_REVALIDATE_INTERVAL', 0):
+            self.assertEqual(self.client.get(self.url).json()['name'], 'City Eye Institute')
+
+
+class BootstrapTests(HospitalTestCase):
+    def test_gallery_is_ordered_and_capped(self):
+        for order in (3, 1, 2):
+            Gallery.objects.create(title=f'Photo {order}', image='gallery/x.jpg', is_featured=True,
+                                   display_order=order)
+        Gallery.objects.create(title='Hidden', image='gallery/x.jpg', is_featured=False, display_order=0)
+        response = self.client.get('/api/bootstrap/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            set(response.json()),
+            {'hospital_info', 'departments', 'featured_news', 'gallery', 'announcements'},
+        )
+        self.assertEqual([item['title'] for item in response.json()['gallery']],
+                         ['Photo 1', 'Photo 2', 'Photo 3'])
+
+        with mock.patch('hospital.views.BootstrapView.gallery_limit', 2), \
+                override_settings(RESPONSE_CACHE_ENABLED=False):
+            self.assertEqual(len(self.client.get('/api/bootstrap/').json()['gallery']), 2)
+
+
+class KeysetPaginationTests(HospitalTestCase):
+    @mock.patch.object(ContactInquiryPagination, 'page_size', 2)
+    def test_rows_sharing_a_millisecond_are_all_paged(self):
+        created_at = timezone.now().replace(microsecond=123000)
+        for i in range(5):
+            inquiry = ContactInquiry.objects.create(
+                name=f'Patient {i}', email='p@example.com', subject='S', message='M'
+            )
+            ContactInquiry.objects.filter(pk=inquiry.pk).update(
+                created_at=created_at + timedelta(microseconds=i * 100)
+            )
+
+        client = self.admin_client()
+        url = f'/api/contact/list/?pagination=cursor&api_key={API_KEY}'
+        seen = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.json()['results']]
+            url = response.json()['next']
+        self.assertEqual(seen, list(
+            ContactInquiry.objects.order_by('-created_at', 'id').values_list('id', flat=True)
+        ))
+
+    @mock.patch.object(AppointmentPagination, 'page_size', 2)
+    def test_rows_tied_on_the_ordering_are_all_paged(self):
+        # Past appointments may share a slot; id breaks the tie
+        for i in range(5):
+            Appointment.objects.create(**appointment_fields(patient_name=f'Patient {i}', status='completed'))
+
+        client = self.admin_client()
+        url = f'/api/appointments/list/?pagination=cursor&api_key={API_KEY}'
+        seen = []
+        while url:
+            response = client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.json()['results']]
+            url = response.json()['next']
+        self.assertEqual(sorted(seen), sorted(Appointment.objects.values_list('id', flat=True)))
+        self.assertEqual(len(seen), 5)
+
+    def test_invalid_cursor_is_404(self):
+        response = self.admin_client().get(f'/api/contact/list/?cursor=bogus&api_key={API_KEY}')
+        self.assertEqual(response.status_code, 404)
+
+
+class ExportTests(HospitalTestCase):
+    def export(self, path, **params):
+        response = self.admin_client().get(path, {'api_key': API_KEY, **params})
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode()
+
+    def test_appointments_export_as_csv(self):
+        Appointment.objects.create(**appointment_fields(patient_name='Meera, Nair'))
+        rows = list(csv.DictReader(self.export('/api/appointments/export/').splitlines()))
+        self.assertEqual([row['patient_name'] for row in rows], ['Meera, Nair'])
+
+    def test_inquiries_export_as_json_lines(self):
+        for name in ('A', 'B'):
+            ContactInquiry.objects.create(name=name, email='a@example.com', subject='S', message='M')
+        lines = self.export('/api/contact/export/', export_format='jsonl').splitlines()
+        self.assertEqual(sorted(json.loads(line)['name'] for line in lines), ['A', 'B'])
+
+    def test_list_filters_apply(self):
+        Appointment.objects.create(**appointment_fields(status='confirmed'))
+        Appointment.objects.create(**appointment_fields(appointment_time=time(11)))
+        rows = list(csv.DictReader(self.export('/api/appointments/export/', status='confirmed').splitlines()))
+        self.assertEqual([row['status'] for row in rows], ['confirmed'])
+
+    def test_unknown_format_is_rejected(self):
+        response = self.admin_client().get(f'/api/appointments/export/?export_format=xml&api_key={API_KEY}')
+        self.assertEqual(response.status_code, 400)
+
+
+class ImportTests(HospitalTestCase):
+    def setUp(self):
+        super().setUp()
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def import_rows(self, rows, *args):
+        path = self.directory / 'appointments.csv'
+        with path.open('w', newline='') as source:
+            writer = csv.DictWriter(source, fieldnames=list(rows[0]))
+            writer.writeheader()
+            writer.writerows(rows)
+        call_command('import_appointments', str(path), *args, stdout=StringIO())
+        with (self.directory / 'appointments.csv.rejects.csv').open() as rejects:
+            return list(csv.DictReader(rejects))
+
+    def test_taken_slots_are_rejected(self):
+        doctor = create_doctor()
+        Appointment.objects.create(doctor=doctor, **appointment_fields())
+        row = appointment_fields(doctor=doctor.pk)
+        rejects = self.import_rows([
+            row,
+            {**row, 'appointment_time': time(11)},
+            {**row, 'appointment_time': time(11), 'patient_name': 'Duplicate'},
+        ])
+
+        self.assertEqual(Appointment.objects.filter(doctor=doctor).count(), 2)
+        self.assertEqual([int(reject['line']) for reject in rejects], [2, 4])
+
+    def test_invalid_rows_are_rejected_with_errors(self):
+        rejects = self.import_rows([
+            appointment_fields(),
+            appointment_fields(patient_email='not-an-email', appointment_time=time(11)),
+        ])
+
+        self.assertEqual(Appointment.objects.count(), 1)
+        self.assertIn('patient_email', json.loads(rejects[0]['errors']))
+
+    def test_dry_run_writes_nothing(self):
+        self.import_rows([appointment_fields()], '--dry-run')
+        self.assertFalse(Appointment.objects.exists())
+
+
+class SearchTermTests(TestCase):
+    def test_emails_and_numbers_are_matched_literally(self):
+        self.assertEqual(
+            split_terms(['anand.shetty@example.com', 'follow-up', '98450']),
+            (['follow', 'up'], ['anand.shetty@example.com', '98450'])
+        )
+
+
+@skipUnless(connection.vendor == 'postgresql', 'search_vector needs PostgreSQL')
+class FullTextSearchTests(HospitalTestCase):
+    def setUp(self):
+        super().setUp()
+        for name, email in [('Anand Shetty', 'anand.shetty@example.com'), ('William Dsouza', 'will@example.org')]:
+            ContactInquiry.objects.create(name=name, email=email, subject='Appointment', message='Follow-up')
+        self.client = self.admin_client()
+
+    def names(self, search):
+        response = self.client.get('/api/contact/list/', {'search': search, 'api_key': API_KEY})
+        self.assertEqual(response.status_code, 200)
+        return sorted(row['name'] for row in response.json()['results'])
+
+    def test_full_email_address(self):
+        self.assertEqual(self.names('anand.shetty@example.com'), ['Anand Shetty'])
+
+    def test_short_prefixes_and_stop_words(self):
+        self.assertEqual(self.names('an'), ['Anand Shetty'])
+        self.assertEqual(self.names('will'), ['William Dsouza'])
+
+    def test_words_match_stemmed_prose(self):
+        self.assertEqual(self.names('appointments follow'), ['Anand Shetty', 'William Dsouza'])
+
+    def test_search_vector_follows_bulk_updates(self):
+        ContactInquiry.objects.filter(name='William Dsouza').update(name='Walter Dsouza')
+        self.assertEqual(self.names('walt'), ['Walter Dsouza'])
+
+
+class SearchSuggestTests(HospitalTestCase):
+    def setUp(self):
+        super().setUp()
+        suggest._state.update(index=None, generations=None, checked_at=None)
+        self.doctor = create_doctor(first_name='Anand', last_name='Désai', specialization='Retina')
+        Service.objects.create(
+            name='Retinal laser', description='', department=self.doctor.department, price_range='-'
+        )
+
+    def labels(self, **params):
+        response = self.client.get('/api/search/suggest/', params)
+        self.assertEqual(response.status_code, 200)
+        return [result['label'] for result in response.json()['results']]
+
+    def test_prefix_matches_rank_first(self):
+        self.assertEqual(sorted(self.labels(q='reti')), ['Dr. Anand Désai', 'Retinal laser'])
+        # 'las' only starts a word of the service; the doctor is merely similar
+        self.assertEqual(self.labels(q='retinal las'), ['Retinal laser', 'Dr. Anand Désai'])
+
+    def test_accents_and_misspellings_match(self):
+        self.assertEqual(self.labels(q='desai'), ['Dr. Anand Désai'])
+        self.assertEqual(self.labels(q='opthalmology'), ['Ophthalmology'])
+
+    def test_type_and_limit(self):
+        self.assertEqual(self.labels(q='ret', type='service'), ['Retinal laser'])
+        self.assertEqual(len(self.labels(q='ret', limit=1)), 1)
+        self.assertEqual(self.client.get('/api/search/suggest/', {'q': 'ret', 'type': 'news'}).status_code, 400)
+        self.assertEqual(self.client.get('/api/search/suggest/', {'q': 'ret', 'limit': 'x'}).status_code, 400)
+
+    def test_lookups_skip_the_database_until_a_write(self):
+        self.labels(q='reti')
+        with self.assertNumQueries(0):
+            self.labels(q='anand')
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.doctor.is_active = False
+            self.doctor.save()
+        with mock.patch('hospital.suggest.LOCAL_REVALIDATE_INTERVAL', 0):
+            self.assertEqual(self.labels(q='anand'), [])
+
+    @override_settings(RATE_LIMITS={**settings.RATE_LIMITS, 'search_suggest': '1/min'})
+    def test_has_its_own_rate_limit(self):
+        self.labels(q='reti')
+        response = self.client.get('/api/search/suggest/', {'q': 'reti'})
+        self.assertEqual(response.status_code, 429)
+        self.assertIn('Retry-After', response)
+
+
+class RequestSecurityMiddlewareTests(HospitalTestCase):
+    def setUp(self):
+        super().setUp()
+        User.objects.create_user('nurse', password='correct-horse')
+        self.view = mock.Mock(return_value=HttpResponse())
+        self.middleware = RequestSecurityMiddleware(self.view)
+        self.factory = RequestFactory()
+
+    def login(self, password, ip='10.0.0.1'):
+        return self.client.post(
+            '/api/auth/login/', {'username': 'nurse', 'password': password}, REMOTE_ADDR=ip
+        )
+
+    def test_failed_logins_lock_the_ip_out(self):
+        for _ in range(settings.MAX_LOGIN_ATTEMPTS):
+            self.login('wrong')
+        self.assertTrue(is_locked_out('10.0.0.1'))
+
+        response = self.login('correct-horse')
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.login('correct-horse', ip='10.0.0.2').status_code, 200)
+
+    def test_locked_out_login_never_reaches_the_view(self):
+        for _ in range(settings.MAX_LOGIN_ATTEMPTS):
+            record_failed_attempt('10.0.0.1')
+        response = self.middleware(self.factory.post('/api/auth/login/', REMOTE_ADDR='10.0.0.1'))
+        self.assertEqual(response.status_code, 429)
+        self.view.assert_not_called()
+
+        # Only the login endpoint is closed to a locked out IP
+        self.middleware(self.factory.post('/api/contact/', REMOTE_ADDR='10.0.0.1'))
+        self.view.assert_called_once()
+
+    def test_successful_login_clears_failed_attempts(self):
+        for _ in range(2):
+            self.login('wrong')
+        self.assertEqual(self.login('correct-horse').status_code, 200)
+        self.assertIsNone(get_cache().get(cache_key('failed_attempts', '10.0.0.1')))
+
+    def test_exempt_paths_skip_the_checks(self):
+        for path in settings.SECURITY_EXEMPT_PATHS:
+            # No request.user either: exempt paths must not touch it
+            self.middleware(self.factory.get(f'{path}x', REMOTE_ADDR='10.0.0.1'))
+        self.assertIsNone(get_cache().get(cache_key('request_count', '10.0.0.1')))
+        self.assertEqual(self.view.call_count, len(settings.SECURITY_EXEMPT_PATHS))
+
+        self.middleware(self.factory.get('/api/doctors/', REMOTE_ADDR='10.0.0.1'))
+        self.assertEqual(get_cache().get(cache_key('request_count', '10.0.0.1')), 1)
+
+    def test_user_is_only_loaded_for_admin_paths(self):
+        # As AuthenticationMiddleware sets it: loaded on first attribute access
+        load_user = mock.Mock(return_value=User.objects.get(username='nurse'))
+        request = self.factory.get('/api/doctors/')
+        request.user = SimpleLazyObject(load_user)
+        self.middleware(request)
+        load_user.assert_not_called()
+
+        with self.assertLogs('hospital.security', 'WARNING') as logs:
+            request = self.factory.get(reverse('admin:index'))
+            request.user = User.objects.get(username='nurse')
+            self.middleware(request)
+        self.assertIn('Unauthorized admin access attempt', logs.output[0])
+
+
+class SanitizationTests(HospitalTestCase):
+    def test_plain_text_is_untouched(self):
+        for value in ['Pain in left eye', 'Tom & Jerry', 'Fish &amp; Chips', 'a < b']:
+            self.assertEqual(sanitize_text(value), value)
+
+    def test_markup_is_stripped_without_escaping(self):
+        self.assertEqual(sanitize_text('<script>x</script><b>Tom</b> & Jerry'), 'xTom & Jerry')
+        self.assertEqual(sanitize_text('&lt;img src=x onerror=alert(1)&gt;<b>Itching</b>'), 'Itching')
+
+    def test_allowed_tags_keep_html_escaping(self):
+        self.assertEqual(sanitize_text('<b>Tom</b> & <i>Jerry</i>', tags={'b'}), '<b>Tom</b> &amp; Jerry')
+
+    def test_serializer_cleans_free_text_fields_only(self):
+        serializer = AppointmentCreateSerializer(data=appointment_fields(
+            reason='<img src=x onerror=alert(1)>Itching & redness', patient_email='ravi@example.com'
+        ))
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data['reason'], 'Itching & redness')
+
+    def test_ampersands_are_stored_as_typed(self):
+        response = self.client.post(f'/api/contact/?api_key={API_KEY}', {
+            'name': 'Tom & Jerry', 'email': 'tom@example.com', 'subject': 'Q&A', 'message': 'R&D <b>visit</b>',
+        })
+        self.assertEqual(response.status_code, 201, response.content)
+        inquiry = ContactInquiry.objects.get()
+        self.assertEqual((inquiry.name, inquiry.subject, inquiry.message), ('Tom & Jerry', 'Q&A', 'R&D visit'))
+
+
+class OutboxTests(HospitalTestCase):
+    def emit_appointment(self, **kwargs):
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = Appointment.objects.create(**appointment_fields(**kwargs))
+        return OutboxEvent.objects.get(payload__appointment_id=appointment.pk)
+
+    def test_events_are_not_delivered_inside_the_request(self):
+        # No broker in tests: tasks would run eagerly, so nothing is queued
+        event = self.emit_appointment()
+        self.assertEqual(len(mail.outbox), 0)
+        self.assertEqual(event.status, 'pending')
+
+    def test_dispatch_delivers_and_marks_done(self):
+        event = self.emit_appointment()
+        self.assertEqual(outbox.dispatch(), 1)
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'done')
+        self.assertEqual(event.attempts, 1)
+        self.assertEqual(mail.outbox[0].to, ['ravi@example.com'])
+        self.assertEqual(mail.outbox[0].extra_headers['X-Idempotency-Key'], str(event.idempotency_key))
+
+    def test_retry_resends_only_the_failed_channel(self):
+        event = self.emit_appointment()
+        sms = mock.Mock()
+        sms.messages.create.side_effect = RuntimeError('SMS gateway down')
+        with mock.patch.object(notifications, 'get_sms_client', return_value=sms):
+            outbox.dispatch()
+            event.refresh_from_db()
+            self.assertEqual(event.status, 'pending')
+            self.assertIsNotNone(event.email_sent_at)
+            self.assertIsNone(event.sms_sent_at)
+            self.assertIn('SMS gateway down', event.last_error)
+
+            sms.messages.create.side_effect = None
+            OutboxEvent.objects.filter(pk=event.pk).update(available_at=timezone.now())
+            outbox.dispatch()
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'done')
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(sms.messages.create.call_count, 2)
+
+    def test_batches_are_sent_from_several_threads(self):
+        events = [self.emit_appointment(appointment_time=time(10 + hour)) for hour in range(3)]
+        self.assertEqual(outbox.dispatch(concurrency=2), 3)
+        self.assertEqual(
+            set(OutboxEvent.objects.filter(pk__in=[e.pk for e in events]).values_list('status', flat=True)),
+            {'done'}
+        )
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_claimed_events_are_leased(self):
+        event = self.emit_appointment()
+        claimed = outbox.claim_batch(10, timezone.now())
+        self.assertEqual([e.pk for e in claimed], [event.pk])
+        self.assertEqual(outbox.claim_batch(10, timezone.now()), [])
+
+    @override_settings(OUTBOX_MAX_ATTEMPTS=1)
+    def test_event_fails_after_max_attempts(self):
+        event = self.emit_appointment()
+        with mock.patch.object(notifications, 'BUILDERS', {}):
+            outbox.dispatch()
+        event.refresh_from_db()
+        self.assertEqual(event.status, 'failed')
+
+
+class OutboxRelayTests(HospitalTestCase):
+    def emit_appointments(self, count):
+        with self.captureOnCommitCallbacks(execute=True):
+            for hour in range(count):
+                Appointment.objects.create(**appointment_fields(appointment_time=time(10 + hour)))
+
+    def test_relay_drains_the_backlog_and_reports(self):
+        self.emit_appointments(3)
+        stdout = StringIO()
+        # Keep the test runner's own SIGINT handling
+        with mock.patch('signal.signal'):
+            call_command('run_outbox_relay', '--once', '--batch-size', '2', stdout=stdout)
+
+        self.assertFalse(OutboxEvent.objects.exclude(status='done').exists())
+        self.assertEqual(len(mail.outbox), 3)
+        self.assertIn('Relayed 3 events', stdout.getvalue())
+        self.assertIn('pending 0, failed 0', stdout.getvalue())
+
+    def test_metrics_count_backlog_and_deliveries(self):
+        self.emit_appointments(2)
+        OutboxEvent.objects.filter(pk=OutboxEvent.objects.order_by('pk')[0].pk).update(
+            created_at=timezone.now() - timedelta(seconds=30)
+        )
+        stats = outbox.metrics()
+        self.assertEqual((stats['pending'], stats['delivered']), (2, 0))
+        self.assertGreaterEqual(stats['lag_seconds'], 30)
+        self.assertIsNone(stats['average_delivery_seconds'])
+
+        outbox.dispatch()
+        stats = outbox.metrics()
+        self.assertEqual((stats['pending'], stats['lag_seconds'], stats['delivered']), (0, 0, 2))
+        self.assertGreaterEqual(stats['average_delivery_seconds'], 15)
+
+    def test_metrics_endpoint_is_admin_only(self):
+        url = f'/api/dashboard/outbox/?api_key={API_KEY}'
+        self.assertIn(self.client.get(url).status_code, (401, 403))
+        response = self.admin_client().get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['pending'], 0)
+
+
+class ReminderTests(HospitalTestCase):
+    def setUp(self):
+        super().setUp()
+        self.now = timezone.make_aware(datetime(2030, 1, 1, 10, 0))
+        self.soon = Appointment.objects.create(**appointment_fields(
+            status='confirmed', appointment_date=date(2030, 1, 1), appointment_time=time(10, 30)
+        ))
+        self.tomorrow = Appointment.objects.create(**appointment_fields(
+            status='confirmed', appointment_date=date(2030, 1, 2), appointment_time=time(9, 0)
+        ))
+        Appointment.objects.create(**appointment_fields(
+            status='pending', appointment_date=date(2030, 1, 1), appointment_time=time(10, 45)
+        ))
+
+    def reminders_sent(self):
+        return sorted(
+            (event.payload['appointment_id'], event.payload['reminder'])
+            for event in OutboxEvent.objects.filter(event_type=outbox.APPOINTMENT_REMINDER)
+        )
+
+    def test_due_reminders_are_queued_once(self):
+        self.assertEqual(reminders.send_due_reminders(now=self.now), {'day': 1, 'hour': 1})
+        self.assertEqual(reminders.send_due_reminders(now=self.now), {'day': 0, 'hour': 0})
+        self.assertEqual(self.reminders_sent(), sorted([(self.soon.pk, 'hour'), (self.tomorrow.pk, 'day')]))
+
+    def test_batches_cover_every_due_appointment(self):
+        self.assertEqual(reminders.send_due_reminders(now=self.now, batch_size=1), {'day': 1, 'hour': 1})
+        self.assertEqual(len(self.reminders_sent()), 2)
+
+    def test_short_notice_bookings_only_get_the_hour_reminder(self):
+        reminders.send_due_reminders(now=self.now)
+        self.soon.refresh_from_db()
+        self.assertIsNone(self.soon.day_reminder_sent_at)
+        self.assertIsNotNone(self.soon.hour_reminder_sent_at)
+
+    def test_rescheduling_resets_reminders(self):
+        reminders.send_due_reminders(now=self.now)
+        self.tomorrow.appointment_time = time(9, 30)
+        self.tomorrow.save()
+        self.tomorrow.refresh_from_db()
+        self.assertIsNone(self.tomorrow.day_reminder_sent_at)
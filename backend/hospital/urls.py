@@ -30,10 +30,12 @@ urlpatterns = [
     # Doctors
     path('doctors/', views.DoctorListView.as_view(), name='doctor-list'),
     path('doctors/<int:pk>/', views.DoctorDetailView.as_view(), name='doctor-detail'),
+    path('doctors/<int:pk>/availability/', views.DoctorAvailabilityView.as_view(), name='doctor-availability'),
     
     # Appointments
     path('appointments/', views.create_appointment, name='appointment-create'),
     path('appointments/list/', views.AppointmentListView.as_view(), name='appointment-list'),
+    path('appointments/export/', views.AppointmentExportView.as_view(), name='appointment-export'),
     
     # News
     path('news/', views.NewsListView.as_view(), name='news-list'),
@@ -43,6 +45,7 @@ urlpatterns = [
     # Contact
     path('contact/', views.ContactInquiryCreateView.as_view(), name='contact-create'),
     path('contact/list/', views.ContactInquiryListView.as_view(), name='contact-list'),
+    path('contact/export/', views.ContactInquiryExportView.as_view(), name='contact-export'),
     path('contact/<int:pk>/', views.ContactInquiryDetailView.as_view(), name='contact-detail'),
     
     # Hospital Info
@@ -54,6 +57,13 @@ urlpatterns = [
     # Announcements
     path('announcements/', views.AnnouncementListView.as_view(), name='announcement-list'),
     
+    # Typeahead suggestions
+    path('search/suggest/', views.SearchSuggestView.as_view(), name='search-suggest'),
+    
+    # Landing page data in one request
+    path('bootstrap/', views.BootstrapView.as_view(), name='bootstrap'),
+    
     # Dashboard
     path('dashboard/stats/', views.dashboard_stats, name='dashboard-stats'),
+    path('dashboard/outbox/', views.outbox_metrics, name='outbox-metrics'),
 ]
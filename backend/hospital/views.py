@@ -4,18 +4,26 @@ from rest_framework.permissions import IsAuthenticated, AllowAny
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
 from django.utils import timezone
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Prefetch, Q
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils.decorators import method_decorator
-from django.core.cache import cache
 from django.conf import settings
 from datetime import datetime, timedelta
 import json
-import time
 from django.http import JsonResponse
 
-from .decorators import api_key_required, rate_limit_ip
+from . import announcements, outbox, slots
+from .dashboard import get_dashboard_stats
+from .decorators import api_key_required, check_rate_limit, rate_limit
+from .exports import ExportMixin
+from .pagination import AppointmentPagination, ContactInquiryPagination
+from .ratelimit import ScopedRateLimitThrottle
+from .reservations import reserve_appointment
+from .search import FullTextSearchFilter
+from .suggest import suggest
+from .response_cache import CachedResponseMixin
 
 from .models import (
     Department, Service, Doctor, DoctorSchedule, Appointment,
@@ -58,41 +66,162 @@ def test_appointments(request):
             'message': str(e)
         }, status=500)
 
-class DepartmentListView(generics.ListCreateAPIView):
+class DepartmentListView(CachedResponseMixin, generics.ListCreateAPIView):
+    # Services counts come from the counters table, one query per page
     queryset = Department.objects.filter(is_active=True)
     serializer_class = DepartmentSerializer
     filter_backends = [filters.SearchFilter]
     search_fields = ['name', 'description']
     permission_classes = [PublicReadOnly]
+    query_budget = 3
+    cache_models = (Department, Service)
 
-class DepartmentDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Department.objects.filter(is_active=True)
+class DepartmentDetailView(CachedResponseMixin, generics.RetrieveUpdateDestroyAPIView):
+    # Counts are annotated and nested lists prefetched (prefetching also fills
+    # each item's department), so a detail request runs three queries in total
+    queryset = Department.objects.filter(is_active=True).annotate(
+        services_count=Count('services', filter=Q(services__is_active=True), distinct=True),
+        doctors_count=Count('doctors', filter=Q(doctors__is_active=True), distinct=True),
+    ).prefetch_related(
+        Prefetch('services', queryset=Service.objects.filter(is_active=True)),
+        Prefetch('doctors', queryset=Doctor.objects.filter(is_active=True)),
+    )
     serializer_class = DepartmentDetailSerializer
     permission_classes = [IsAdminOrReadOnly]
+    query_budget = 3
+    cache_models = (Department, Service, Doctor)
 
-class ServiceListView(generics.ListCreateAPIView):
-    queryset = Service.objects.filter(is_active=True)
+class ServiceListView(CachedResponseMixin, generics.ListCreateAPIView):
+    # Columns limited to ServiceSerializer's fields, department name joined in
+    queryset = Service.objects.filter(is_active=True).select_related('department').only(
+        'id', 'name', 'description', 'department', 'department__name',
+        'image', 'price_range', 'is_active'
+    )
     serializer_class = ServiceSerializer
     filter_backends = [DjangoFilterBackend, filters.SearchFilter]
     filterset_fields = ['department']
     search_fields = ['name', 'description']
     permission_classes = [PublicReadOnly]
+    query_budget = 2
+    cache_models = (Service, Department)
 
-class DoctorListView(generics.ListCreateAPIView):
-    queryset = Doctor.objects.filter(is_active=True)
+class DoctorListView(CachedResponseMixin, generics.ListCreateAPIView):
+    # Columns limited to DoctorListSerializer's fields, department name joined in
+    queryset = Doctor.objects.filter(is_active=True).select_related('department').only(
+        'id', 'first_name', 'last_name', 'specialization', 'department',
+        'department__name', 'photo', 'years_of_experience', 'consultation_fee',
+        'is_available'
+    )
     serializer_class = DoctorListSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['department', 'specialization', 'is_available']
     search_fields = ['first_name', 'last_name', 'specialization', 'qualifications']
     ordering_fields = ['first_name', 'years_of_experience', 'consultation_fee']
     ordering = ['first_name']
     permission_classes = [PublicReadOnly]
+    query_budget = 2
+    cache_models = (Doctor, Department)
 
 class DoctorDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = Doctor.objects.filter(is_active=True)
     serializer_class = DoctorDetailSerializer
     permission_classes = [IsAdminOrReadOnly]
 
+class DoctorAvailabilityView(generics.GenericAPIView):
+    """Free appointment slots for a doctor over a date range (default: next 7 days)"""
+    permission_classes = [AllowAny]
+    max_range_days = 31
+
+    def get(self, request, pk):
+        doctor = Doctor.objects.filter(pk=pk, is_active=True).values(
+            'id', 'consultation_duration'
+        ).first()
+        if not doctor:
+            return Response({'error': 'Doctor not found'}, status=status.HTTP_404_NOT_FOUND)
+
+        today = timezone.localdate()
+        try:
+            start_date = self.parse_date(request.query_params.get('start_date')) or today
+            end_date = (
+                self.parse_date(request.query_params.get('end_date'))
+                or start_date + timedelta(days=6)
+            )
+        except ValueError:
+            return Response(
+                {'error': 'Dates must be in YYYY-MM-DD format'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        start_date = max(start_date, today)
+        if end_date < start_date:
+            return Response(
+                {'error': 'end_date must not be before start_date'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if (end_date - start_date).days >= self.max_range_days:
+            return Response(
+                {'error': f'Date range cannot exceed {self.max_range_days} days'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        dates = [start_date + timedelta(days=i) for i in range((end_date - start_date).days + 1)]
+        entries = slots.get_range_entries(doctor['id'], dates)
+        now = timezone.localtime().time()
+
+        availability = []
+        for date in dates:
+            free = slots.free_slots_from_entry(entries[date])
+            if date == today:
+                free = [t for t in free if t > now]
+            availability.append({
+                'date': date.isoformat(),
+                'day_name': date.strftime('%A'),
+                # False: no schedule that day, so any time can be requested
+                'scheduled': entries[date]['slots'] is not None,
+                'slots': [t.isoformat() for t in free],
+            })
+
+        return Response({
+            'doctor': doctor['id'],
+            'consultation_duration': doctor['consultation_duration'],
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'availability': availability,
+        })
+
+    def parse_date(self, value):
+        if not value:
+            return None
+        return datetime.strptime(value, '%Y-%m-%d').date()
+
+class SearchSuggestView(generics.GenericAPIView):
+    """Typeahead: ids and names of doctors, services and departments matching ?q="""
+    permission_classes = [AllowAny]
+    # Fired on every keystroke, so it gets its own limit instead of the anon/user ones
+    throttle_classes = [ScopedRateLimitThrottle]
+    rate_limit_scope = 'search_suggest'
+    default_limit = 8
+    max_limit = 20
+    max_query_length = 100
+    types = ('doctor', 'service', 'department')
+
+    def get(self, request):
+        query = request.query_params.get('q', '').strip()[:self.max_query_length]
+        try:
+            limit = int(request.query_params.get('limit', self.default_limit))
+        except ValueError:
+            return Response({'error': 'limit must be a number'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, self.max_limit))
+
+        types = {t for t in request.query_params.get('type', '').split(',') if t}
+        if types - set(self.types):
+            return Response(
+                {'error': f"type must be one of: {', '.join(self.types)}"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        return Response({'query': query, 'results': suggest(query, limit, types or None)})
+
 @csrf_exempt
 @api_view(['POST', 'OPTIONS'])
 @permission_classes([AllowAny])
@@ -113,33 +242,33 @@ def create_appointment(request):
         return JsonResponse({'error': 'Invalid API key'}, status=401)
     
     # Apply rate limiting
-    from .decorators import get_client_ip
-    ip = get_client_ip(request)
-    cache_key = f'rate_limit_{ip}_appointment_create'
-    requests = cache.get(cache_key, [])
-    now = time.time()
-    requests = [req_time for req_time in requests if now - req_time < 60]
-    if len(requests) >= 5:
-        return JsonResponse({'error': 'Rate limit exceeded'}, status=429)
-    requests.append(now)
-    cache.set(cache_key, requests, 60)
+    check_rate_limit(request, 'appointment_create')
     
     # Create appointment
     serializer = AppointmentCreateSerializer(data=request.data)
     if serializer.is_valid():
-        appointment = serializer.save()
+        reserve_appointment(serializer)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 class AppointmentListView(generics.ListAPIView):
-    queryset = Appointment.objects.all()
+    # Columns limited to AppointmentSerializer's fields, doctor name joined in
+    queryset = Appointment.objects.select_related('doctor').only(
+        'id', 'patient_name', 'patient_email', 'patient_phone', 'patient_age',
+        'patient_gender', 'doctor', 'doctor__first_name', 'doctor__last_name',
+        'appointment_date', 'appointment_time', 'reason', 'notes', 'status',
+        'is_emergency', 'created_at'
+    )
     serializer_class = AppointmentSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['status', 'is_emergency', 'appointment_date']
     search_fields = ['patient_name', 'patient_email', 'reason']
     ordering_fields = ['appointment_date', 'appointment_time', 'created_at']
     ordering = ['-appointment_date', '-appointment_time']
+    pagination_class = AppointmentPagination
     permission_classes = [IsAdminUser]  # Only admins can view all appointments
+    rate_limit_scope = 'appointment_list'
+    query_budget = 2
     
     def dispatch(self, request, *args, **kwargs):
         # Apply API key check
@@ -148,27 +277,23 @@ class AppointmentListView(generics.ListAPIView):
         if api_key not in valid_keys:
             return JsonResponse({'error': 'Invalid API key'}, status=401)
         
-        # Apply rate limiting
-        from .decorators import get_client_ip
-        ip = get_client_ip(request)
-        cache_key = f'rate_limit_{ip}_appointment_list'
-        requests = cache.get(cache_key, [])
-        now = time.time()
-        requests = [req_time for req_time in requests if now - req_time < 60]
-        if len(requests) >= 20:
-            return JsonResponse({'error': 'Rate limit exceeded'}, status=429)
-        requests.append(now)
-        cache.set(cache_key, requests, 60)
-        
         return super().dispatch(request, *args, **kwargs)
 
-class NewsListView(generics.ListCreateAPIView):
-    queryset = News.objects.filter(is_published=True)
+class AppointmentExportView(ExportMixin, AppointmentListView):
+    """Appointments matching the list filters, streamed as CSV or JSON Lines"""
+    export_filename = 'appointments'
+    rate_limit_scope = 'data_export'
+    query_budget = None
+
+class NewsListView(CachedResponseMixin, generics.ListCreateAPIView):
+    # The stored tsvector is only needed inside the database
+    queryset = News.objects.filter(is_published=True).defer('search_vector')
     serializer_class = NewsListSerializer
-    filter_backends = [filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [filters.OrderingFilter, FullTextSearchFilter]
     search_fields = ['title', 'content', 'excerpt']
     ordering = ['-published_date']
     permission_classes = [PublicReadOnly]
+    cache_models = (News,)
 
 class NewsDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = News.objects.filter(is_published=True)
@@ -176,14 +301,21 @@ class NewsDetailView(generics.RetrieveUpdateDestroyAPIView):
     lookup_field = 'slug'
     permission_classes = [IsAdminOrReadOnly]
 
-class FeaturedNewsView(generics.ListAPIView):
+class FeaturedNewsView(CachedResponseMixin, generics.ListAPIView):
     queryset = News.objects.filter(is_published=True, is_featured=True)[:5]
     serializer_class = NewsListSerializer
     permission_classes = [AllowAny]
+    cache_models = (News,)
 
 class ContactInquiryCreateView(generics.CreateAPIView):
     serializer_class = ContactInquiryCreateSerializer
     permission_classes = [AllowAny]  # Allow public to create contact inquiries
+    rate_limit_scope = 'contact_create'
+    
+    def perform_create(self, serializer):
+        # The inquiry and its outbox event commit together
+        with transaction.atomic():
+            serializer.save()
     
     def dispatch(self, request, *args, **kwargs):
         # Apply API key check
@@ -192,85 +324,119 @@ class ContactInquiryCreateView(generics.CreateAPIView):
         if api_key not in valid_keys:
             return JsonResponse({'error': 'Invalid API key'}, status=401)
         
-        # Apply rate limiting
-        from .decorators import get_client_ip
-        ip = get_client_ip(request)
-        cache_key = f'rate_limit_{ip}_contact_create'
-        requests = cache.get(cache_key, [])
-        now = time.time()
-        requests = [req_time for req_time in requests if now - req_time < 60]
-        if len(requests) >= 3:
-            return JsonResponse({'error': 'Rate limit exceeded'}, status=429)
-        requests.append(now)
-        cache.set(cache_key, requests, 60)
-        
         return super().dispatch(request, *args, **kwargs)
 
 class ContactInquiryListView(generics.ListAPIView):
-    queryset = ContactInquiry.objects.all()
+    queryset = ContactInquiry.objects.defer('search_vector')
     serializer_class = ContactInquirySerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter, filters.OrderingFilter]
+    filter_backends = [DjangoFilterBackend, filters.OrderingFilter, FullTextSearchFilter]
     filterset_fields = ['inquiry_type', 'is_resolved']
     search_fields = ['name', 'email', 'subject', 'message']
     ordering_fields = ['created_at', 'is_resolved']
     ordering = ['-created_at']
+    pagination_class = ContactInquiryPagination
     permission_classes = [IsAdminUser]
 
+class ContactInquiryExportView(ExportMixin, ContactInquiryListView):
+    """Inquiries matching the list filters, streamed as CSV or JSON Lines"""
+    export_filename = 'contact-inquiries'
+    rate_limit_scope = 'data_export'
+
 class ContactInquiryDetailView(generics.RetrieveUpdateDestroyAPIView):
     queryset = ContactInquiry.objects.all()
     serializer_class = ContactInquirySerializer
     permission_classes = [IsAdminUser]
 
-class HospitalInfoView(generics.RetrieveUpdateAPIView):
+class HospitalInfoView(CachedResponseMixin, generics.RetrieveUpdateAPIView):
     queryset = HospitalInfo.objects.all()
     serializer_class = HospitalInfoSerializer
     permission_classes = [IsAdminOrReadOnly]
+    cache_models = (HospitalInfo,)
+    # Requested by every page's header and footer, edited rarely
+    cache_locally = True
     
     def get_object(self):
         return HospitalInfo.objects.first()
 
-class GalleryListView(generics.ListCreateAPIView):
+class GalleryListView(CachedResponseMixin, generics.ListCreateAPIView):
     queryset = Gallery.objects.all()
     serializer_class = GallerySerializer
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ['category', 'is_featured']
     ordering = ['display_order', '-created_at']
     permission_classes = [PublicReadOnly]
+    cache_models = (Gallery,)
 
-class AnnouncementListView(generics.ListCreateAPIView):
+class AnnouncementListView(CachedResponseMixin, generics.ListCreateAPIView):
     serializer_class = AnnouncementSerializer
     permission_classes = [IsAdminOrReadOnly]
+    cache_models = (Announcement,)
+    search_fields = ['title', 'content']
+    ordering_fields = ['title', 'start_date', 'is_urgent']
     
     def get_queryset(self):
-        now = timezone.now()
-        return Announcement.objects.filter(
-            is_active=True,
-            start_date__lte=now
-        ).filter(
-            Q(end_date__isnull=True) | Q(end_date__gte=now)
-        ).order_by('-is_urgent', '-start_date')
+        # The active ids are cached until the next start/end boundary or
+        # announcement write; filters and ordering apply to the QuerySet
+        return announcements.active_announcements()
+    
+    def get_cache_timeout(self):
+        # The set also changes with the clock; expire at the next boundary
+        return min(announcements.seconds_until_change(), super().get_cache_timeout())
+
+
+class BootstrapView(CachedResponseMixin, generics.RetrieveAPIView):
+    """Everything the landing page needs, in one cacheable response"""
+    permission_classes = [AllowAny]
+    cache_models = (HospitalInfo, Department, Service, News, Gallery, Announcement)
+    # Hospital info, departments (+ services counters), featured news, featured
+    # gallery, announcements, and the active announcement ids when their cache is cold
+    query_budget = 8
+    featured_news_limit = 5
+    # Same cap as one page of GalleryListView
+    gallery_limit = settings.REST_FRAMEWORK['PAGE_SIZE']
+    
+    def get_cache_timeout(self):
+        return min(announcements.seconds_until_change(), super().get_cache_timeout())
+    
+    def list_data(self, serializer_class, items):
+        return serializer_class(items, many=True, context=self.get_serializer_context()).data
+    
+    def retrieve(self, request, *args, **kwargs):
+        info = HospitalInfo.objects.first()
+        context = self.get_serializer_context()
+        return Response({
+            'hospital_info': HospitalInfoSerializer(info, context=context).data if info else None,
+            'departments': self.list_data(
+                DepartmentSerializer, Department.objects.filter(is_active=True)
+            ),
+            'featured_news': self.list_data(
+                NewsListSerializer,
+                News.objects.filter(is_published=True, is_featured=True)[:self.featured_news_limit]
+            ),
+            'gallery': self.list_data(
+                GallerySerializer,
+                Gallery.objects.filter(is_featured=True).order_by(
+                    'display_order', '-created_at'
+                )[:self.gallery_limit]
+            ),
+            'announcements': self.list_data(
+                AnnouncementSerializer, announcements.active_announcements()
+            ),
+        })
 
 
 @api_view(['GET'])
 @permission_classes([IsAdminUser])
 @api_key_required
-@rate_limit_ip(max_requests=10, time_window=60)
+@rate_limit('dashboard_stats')
 def dashboard_stats(request):
     """Get dashboard statistics - Admin only"""
-    stats = {
-        'total_departments': Department.objects.filter(is_active=True).count(),
-        'total_services': Service.objects.filter(is_active=True).count(),
-        'total_doctors': Doctor.objects.filter(is_active=True).count(),
-        'pending_appointments': Appointment.objects.filter(status='pending').count(),
-        'today_appointments': Appointment.objects.filter(
-            appointment_date=timezone.now().date()
-        ).count(),
-        'unresolved_inquiries': ContactInquiry.objects.filter(is_resolved=False).count(),
-        'active_announcements': Announcement.objects.filter(
-            is_active=True,
-            start_date__lte=timezone.now()
-        ).filter(
-            Q(end_date__isnull=True) | Q(end_date__gte=timezone.now())
-        ).count(),
-    }
-    return Response(stats)
+    return Response(get_dashboard_stats())
+
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+@api_key_required
+def outbox_metrics(request):
+    """Notification outbox backlog, throughput and lag - Admin only"""
+    return Response(outbox.metrics())
@@ -0,0 +1,10 @@
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'hospital_website.settings')
+
+app = Celery('hospital_website')
+# All CELERY_* settings in settings.py configure the app
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -29,13 +29,12 @@ MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
-    'hospital.middleware.SecurityLoggingMiddleware',  # Custom security logging
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'hospital.csrf_middleware.DisableCSRFForAPIMiddleware',  # Disable CSRF for API endpoints
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'hospital.middleware.LoginAttemptMiddleware',  # Track login attempts
+    'hospital.middleware.RequestSecurityMiddleware',  # Lockouts, security logging
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -72,6 +71,43 @@ DATABASES = {
     }
 }
 
+# Cache
+# Redis is shared by every gunicorn worker and node, so rate limits, lockouts
+# and cached data agree across processes. Without REDIS_URL (local development,
+# tests) a per-process in-memory cache stands in for it.
+REDIS_URL = config('REDIS_URL', default='')
+CACHE_KEY_PREFIX = config('CACHE_KEY_PREFIX', default='hospital')
+
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+            'KEY_PREFIX': CACHE_KEY_PREFIX,
+            'TIMEOUT': 300,
+            'OPTIONS': {
+                # Passed through to redis-py's connection pool
+                'max_connections': config('REDIS_MAX_CONNECTIONS', default=50, cast=int),
+                'socket_connect_timeout': 2,
+                'socket_timeout': 2,
+                'retry_on_timeout': True,
+                'health_check_interval': 30,
+            },
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'hospital-local',
+            'KEY_PREFIX': CACHE_KEY_PREFIX,
+            'TIMEOUT': 300,
+        }
+    }
+
+# Cache alias used by hospital.cache
+HOSPITAL_CACHE_ALIAS = 'default'
+
 # Enhanced Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -122,15 +158,28 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
     'DEFAULT_THROTTLE_CLASSES': [
-        'rest_framework.throttling.AnonRateThrottle',
-        'rest_framework.throttling.UserRateThrottle'
+        'hospital.ratelimit.AnonRateLimitThrottle',
+        'hospital.ratelimit.UserRateLimitThrottle',
+        'hospital.ratelimit.ScopedRateLimitThrottle',  # Views with rate_limit_scope
     ],
-    'DEFAULT_THROTTLE_RATES': {
-        'anon': '100/hour',
-        'user': '1000/hour'
-    }
 }
 
+# Rate limits per scope (requests/period, period in s, min, hour or day).
+# Used by hospital.ratelimit for DRF throttles and the rate_limit decorator.
+RATE_LIMITS = {
+    'anon': '100/hour',
+    'user': '1000/hour',
+    'appointment_create': '5/min',
+    'appointment_list': '20/min',
+    'contact_create': '3/min',
+    'dashboard_stats': '10/min',
+    'data_export': '10/hour',
+    'search_suggest': '120/min',
+}
+
+# Path prefixes hospital.middleware.RequestSecurityMiddleware skips entirely
+SECURITY_EXEMPT_PATHS = ['/api/health/', STATIC_URL, MEDIA_URL]
+
 # Session Security Settings
 SESSION_COOKIE_AGE = 3600  # 1 hour
 SESSION_EXPIRE_AT_BROWSER_CLOSE = True
@@ -163,6 +212,22 @@ LOGOUT_REDIRECT_URL = '/'
 MAX_LOGIN_ATTEMPTS = 5
 LOCKOUT_DURATION = 300  # 5 minutes in seconds
 
+# Appointment slot availability index
+SLOT_INDEX_TIMEOUT = 60 * 60  # Cached doctor-day entries expire after 1 hour
+
+# Admin dashboard statistics are cached for a few seconds
+DASHBOARD_STATS_CACHE_TIMEOUT = config('DASHBOARD_STATS_CACHE_TIMEOUT', default=5, cast=int)
+
+# Cached responses for public read endpoints (see hospital/response_cache.py)
+RESPONSE_CACHE_ENABLED = config('RESPONSE_CACHE_ENABLED', default=True, cast=bool)
+RESPONSE_CACHE_TIMEOUT = config('RESPONSE_CACHE_TIMEOUT', default=300, cast=int)
+# Process-local entries (HospitalInfo) re-check for writes this often, in seconds
+RESPONSE_CACHE_LOCAL_REVALIDATE = 1
+
+# The active announcement set is cached until its next start/end boundary,
+# and at most this long when none is coming up
+ANNOUNCEMENT_CACHE_MAX_TIMEOUT = 24 * 60 * 60
+
 # CORS settings
 CORS_ALLOW_ALL_ORIGINS = config('CORS_ALLOW_ALL_ORIGINS', default=True, cast=bool)
 CORS_ALLOW_CREDENTIALS = config('CORS_ALLOW_CREDENTIALS', default=True, cast=bool)
@@ -180,6 +245,57 @@ EMAIL_PORT = config('EMAIL_PORT', default=587, cast=int)
 EMAIL_USE_TLS = config('EMAIL_USE_TLS', default=True, cast=bool)
 EMAIL_HOST_USER = config('EMAIL_HOST_USER', default='')
 EMAIL_HOST_PASSWORD = config('EMAIL_HOST_PASSWORD', default='')
+# Seconds before a stalled SMTP connection is given up on
+EMAIL_TIMEOUT = config('EMAIL_TIMEOUT', default=10, cast=int)
+DEFAULT_FROM_EMAIL = config('DEFAULT_FROM_EMAIL', default=EMAIL_HOST_USER or 'webmaster@localhost')
+
+# SMS notifications (sent only when an account is configured)
+TWILIO_ACCOUNT_SID = config('TWILIO_ACCOUNT_SID', default='')
+TWILIO_AUTH_TOKEN = config('TWILIO_AUTH_TOKEN', default='')
+TWILIO_FROM_NUMBER = config('TWILIO_FROM_NUMBER', default='')
+TWILIO_TIMEOUT = config('TWILIO_TIMEOUT', default=10, cast=int)
+
+# Celery. Without a broker (local development, tests) tasks run in-process,
+# and outbox events are only delivered by `manage.py run_outbox_relay`
+CELERY_BROKER_URL = config('CELERY_BROKER_URL', default=REDIS_URL) or 'memory://'
+CELERY_TASK_ALWAYS_EAGER = config(
+    'CELERY_TASK_ALWAYS_EAGER', default=CELERY_BROKER_URL == 'memory://', cast=bool
+)
+# Tasks are queued from requests after commit: fail fast if the broker is
+# down and leave the event to the periodic dispatch
+CELERY_TASK_PUBLISH_RETRY = False
+CELERY_BEAT_SCHEDULE = {
+    'dispatch-outbox': {
+        'task': 'hospital.tasks.dispatch_outbox',
+        'schedule': 60.0,
+    },
+    # Hour-before reminders go out 55-60 minutes ahead at this interval
+    'appointment-reminders': {
+        'task': 'hospital.tasks.send_appointment_reminders',
+        'schedule': 300.0,
+    },
+    # Hot counters are updated after commit (see hospital/counters.py)
+    'reconcile-counters': {
+        'task': 'hospital.tasks.reconcile_counters',
+        'schedule': 60 * 60.0,
+    },
+}
+
+# Notification outbox (hospital.outbox)
+OUTBOX_BATCH_SIZE = 100
+# Threads sending one batch, each with its own SMTP connection
+OUTBOX_CONCURRENCY = 4
+OUTBOX_MAX_ATTEMPTS = 8
+# Seconds before the first retry of a failed event, doubled for each attempt after it
+OUTBOX_RETRY_DELAY = 30
+# Seconds events are collected after a commit before the dispatch task runs
+OUTBOX_DISPATCH_DELAY = 2
+# Seconds a claimed batch is hidden from other workers while it is delivered;
+# events of a worker that died mid-batch become due again after this
+OUTBOX_CLAIM_TIMEOUT = 10 * 60
+
+# Appointments locked, queued and marked per reminder batch (hospital.reminders)
+REMINDER_BATCH_SIZE = 500
 
 # AWS S3 Configuration (for production)
 if AWS_ACCESS_KEY_ID and AWS_SECRET_ACCESS_KEY:
@@ -108,6 +108,33 @@ def test_appointment_creation():
     except Exception as e:
         print(f"❌ Appointment creation error: {e}")
 
+def test_department_query_counts():
+    """Department endpoints run a fixed number of queries however many rows exist"""
+    from django.db import connection
+    from django.test import Client, override_settings
+    from django.test.utils import CaptureQueriesContext
+
+    client = Client(HTTP_HOST='localhost')
+    # List: pagination COUNT + departments + one read of the services counters
+    # Detail: one annotated SELECT + prefetches for services and doctors
+    expected = {'/api/departments/': 3}
+    department = Department.objects.filter(is_active=True).first()
+    if department:
+        expected[f'/api/departments/{department.pk}/'] = 3
+
+    all_ok = True
+    for url, expected_queries in expected.items():
+        # A cached response would run no queries at all
+        with override_settings(RESPONSE_CACHE_ENABLED=False), CaptureQueriesContext(connection) as context:
+            response = client.get(url)
+        executed = len(context.captured_queries)
+        if response.status_code == 200 and executed == expected_queries:
+            print(f"✅ {url} ran {executed} queries")
+        else:
+            all_ok = False
+            print(f"❌ {url} ran {executed} queries (expected {expected_queries}), status {response.status_code}")
+    return all_ok
+
 def create_sample_data():
     """Create sample data for testing"""
     try:
@@ -159,6 +186,10 @@ if __name__ == "__main__":
         # Test appointment creation
         print("\n4. Testing Appointment Creation:")
         test_appointment_creation()
+        
+        # Test query counts
+        print("\n5. Testing Query Counts:")
+        test_department_query_counts()
     
     print("\n" + "=" * 50)
     print("🏥 Backend test completed!")
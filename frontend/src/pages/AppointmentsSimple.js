@@ -5,6 +5,18 @@ import { appointmentsAPI, doctorsAPI } from '../services/api';
 import { toast, ToastContainer } from 'react-toastify';
 import 'react-toastify/dist/ReactToastify.css';
 
+// Offered when no doctor is chosen, or the doctor has no schedule for the day
+const DEFAULT_TIMES = [
+  '09:00:00', '09:30:00', '10:00:00', '10:30:00', '11:00:00', '11:30:00', '12:00:00',
+  '14:00:00', '14:30:00', '15:00:00', '15:30:00', '16:00:00', '16:30:00', '17:00:00'
+];
+
+const formatTime = (value) => {
+  const [hours, minutes] = value.split(':').map(Number);
+  const suffix = hours >= 12 ? 'PM' : 'AM';
+  return `${hours % 12 || 12}:${String(minutes).padStart(2, '0')} ${suffix}`;
+};
+
 const Appointments = () => {
   const [formData, setFormData] = useState({
     patient_name: '',
@@ -20,11 +32,47 @@ const Appointments = () => {
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [doctors, setDoctors] = useState([]);
   const [loadingDoctors, setLoadingDoctors] = useState(true);
+  // Free slots of the chosen doctor on the chosen date; null means any default time
+  const [doctorSlots, setDoctorSlots] = useState(null);
+  const [loadingSlots, setLoadingSlots] = useState(false);
 
   useEffect(() => {
     fetchDoctors();
   }, []);
 
+  useEffect(() => {
+    const { doctor, appointment_date } = formData;
+    setDoctorSlots(null);
+    if (!doctor || !appointment_date) {
+      setLoadingSlots(false);
+      return undefined;
+    }
+
+    let cancelled = false;
+    setLoadingSlots(true);
+    doctorsAPI.getAvailability(doctor, { start_date: appointment_date, end_date: appointment_date })
+      .then((response) => {
+        const day = response.data?.availability?.[0];
+        if (!cancelled) {
+          setDoctorSlots(day && day.scheduled ? day.slots : null);
+        }
+      })
+      .catch((error) => {
+        // Fall back to the default times; the server still checks the slot
+        console.error('Error fetching availability:', error);
+      })
+      .finally(() => {
+        if (!cancelled) {
+          setLoadingSlots(false);
+        }
+      });
+    return () => {
+      cancelled = true;
+    };
+  }, [formData.doctor, formData.appointment_date]);
+
+  const timeOptions = doctorSlots || DEFAULT_TIMES;
+
   const fetchDoctors = async () => {
     try {
       setLoadingDoctors(true);
@@ -45,7 +93,9 @@ const Appointments = () => {
     const { name, value } = e.target;
     setFormData(prev => ({
       ...prev,
-      [name]: value
+      [name]: value,
+      // The offered times depend on the doctor and date
+      ...((name === 'doctor' || name === 'appointment_date') && { appointment_time: '' })
     }));
   };
 
@@ -383,24 +433,20 @@ const Appointments = () => {
                     value={formData.appointment_time}
                     onChange={handleInputChange}
                     required
-                    className="w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent"
+                    disabled={loadingSlots}
+                    className="w-full px-4 py-3 border border-gray-300 rounded-lg focus:ring-2 focus:ring-blue-500 focus:border-transparent disabled:bg-gray-100 disabled:cursor-not-allowed"
                   >
                     <option value="">Select Time</option>
-                    <option value="09:00:00">9:00 AM</option>
-                    <option value="09:30:00">9:30 AM</option>
-                    <option value="10:00:00">10:00 AM</option>
-                    <option value="10:30:00">10:30 AM</option>
-                    <option value="11:00:00">11:00 AM</option>
-                    <option value="11:30:00">11:30 AM</option>
-                    <option value="12:00:00">12:00 PM</option>
-                    <option value="14:00:00">2:00 PM</option>
-                    <option value="14:30:00">2:30 PM</option>
-                    <option value="15:00:00">3:00 PM</option>
-                    <option value="15:30:00">3:30 PM</option>
-                    <option value="16:00:00">4:00 PM</option>
-                    <option value="16:30:00">4:30 PM</option>
-                    <option value="17:00:00">5:00 PM</option>
+                    {timeOptions.map((time) => (
+                      <option key={time} value={time}>{formatTime(time)}</option>
+                    ))}
                   </select>
+                  {loadingSlots && (
+                    <p className="mt-1 text-xs text-gray-500">Checking the doctor's availability...</p>
+                  )}
+                  {doctorSlots && doctorSlots.length === 0 && (
+                    <p className="mt-1 text-xs text-gray-500">No free times on this date, please pick another day</p>
+                  )}
                 </div>
 
                 {/* Reason for Visit */}
@@ -1,6 +1,7 @@
 import React, { useEffect, useState } from 'react';
 import { Link } from 'react-router-dom';
 import { ChevronLeft, ChevronRight } from 'lucide-react';
+import { hospitalAPI } from '../services/api';
 import cataractSurgeryPlaceholder from './cataract-surgery-placeholder.jpg';
 import lasikPlaceholder from './lasik.jpg';
 import iclPlaceholder from './icl-surgery.jpg';
@@ -54,14 +55,24 @@ const goToPreviousImage = () => {
   );
 };
 
-// Temporary hardcoded data for testing
-const hospitalInfo = {
-data: {
-name: 'Gopala Nethralaya',
-tagline: 'Caring for Your Health',
-}
+// Shown until the landing page data arrives, or if it can't be loaded
+const defaultHospitalInfo = {
+  name: 'Gopala Nethralaya',
+  tagline: 'Caring for Your Health',
 };
 
+const [bootstrap, setBootstrap] = useState(null);
+
+// Hospital info and active announcements in one request
+useEffect(() => {
+  hospitalAPI.getBootstrap()
+    .then((response) => setBootstrap(response.data))
+    .catch((error) => console.error('Error fetching landing page data:', error));
+}, []);
+
+const hospitalInfo = { ...defaultHospitalInfo, ...(bootstrap?.hospital_info || {}) };
+const announcements = bootstrap?.announcements || [];
+
 
 return (
 <div className="min-h-screen">
@@ -131,11 +142,26 @@ return (
     </div>
     
     <h1 className="text-6xl md:text-7xl font-bold mb-6 leading-tight text-white drop-shadow-2xl">
-      Welcome to {hospitalInfo?.data?.name}
+      Welcome to {hospitalInfo.name}
     </h1>
     <p className="text-2xl md:text-3xl mb-8 font-semibold text-white drop-shadow-xl">
-      {hospitalInfo?.data?.tagline}
+      {hospitalInfo.tagline}
     </p>
+    {announcements.length > 0 && (
+      <div className="max-w-2xl mx-auto mb-8 space-y-2">
+        {announcements.map((announcement) => (
+          <div
+            key={announcement.id}
+            className={`rounded-lg px-4 py-3 text-left shadow-lg ${
+              announcement.is_urgent ? 'bg-red-600 text-white' : 'bg-white/90 text-gray-900'
+            }`}
+          >
+            <p className="font-semibold">{announcement.title}</p>
+            <p className="text-sm">{announcement.content}</p>
+          </div>
+        ))}
+      </div>
+    )}
     <div className="flex flex-col sm:flex-row gap-4 justify-center">
       <Link to="/appointments" className="btn-primary">Book Appointment</Link>
       <Link to="https://maps.app.goo.gl/7G6mQfcwDBhGVvZ17" className="btn-primary">
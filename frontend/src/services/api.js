@@ -84,6 +84,7 @@ export const authAPI = {
 // Hospital Info API
 export const hospitalAPI = {
   getInfo: () => api.get('/hospital-info/'),
+  getBootstrap: () => api.get('/bootstrap/'),
   getStats: () => api.get('/dashboard/stats/'),
 };
 
@@ -103,6 +104,7 @@ export const servicesAPI = {
 export const doctorsAPI = {
   getAll: (params = {}) => api.get('/doctors/', { params }),
   getById: (id) => api.get(`/doctors/${id}/`),
+  getAvailability: (id, params = {}) => api.get(`/doctors/${id}/availability/`, { params }),
 };
 
 
@@ -110,6 +112,7 @@ export const doctorsAPI = {
 export const appointmentsAPI = {
   create: (data) => api.post('/appointments/', data),
   getAll: (params = {}) => api.get('/appointments/list/', { params }),
+  export: (params = {}) => api.get('/appointments/export/', { params, responseType: 'blob' }),
   getById: (id) => api.get(`/appointments/${id}/`),
 };
 
@@ -124,6 +127,7 @@ export const newsAPI = {
 export const contactAPI = {
   create: (data) => api.post('/contact/', data),
   getAll: (params = {}) => api.get('/contact/list/', { params }),
+  export: (params = {}) => api.get('/contact/export/', { params, responseType: 'blob' }),
   getById: (id) => api.get(`/contact/${id}/`),
   update: (id, data) => api.patch(`/contact/${id}/`, data),
 };
@@ -133,6 +137,11 @@ export const galleryAPI = {
   getAll: (params = {}) => api.get('/gallery/', { params }),
 };
 
+// Search API
+export const searchAPI = {
+  suggest: (q, params = {}) => api.get('/search/suggest/', { params: { q, ...params } }),
+};
+
 // Announcements API
 export const announcementsAPI = {
   getAll: (params = {}) => api.get('/announcements/', { params }),